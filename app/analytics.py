@@ -0,0 +1,159 @@
+from operator import attrgetter, itemgetter
+
+from car import Car
+
+try:
+    import numpy as np
+except ImportError:  # declared in requirements.txt; basic stats still work without it
+    np = None
+
+PERCENTILES = (10, 25, 50, 75, 90)
+
+
+def available() -> bool:
+    return np is not None
+
+
+class InventoryColumns:
+    """
+    The inventory as parallel NumPy arrays, one per field, for vectorized reports.
+
+    Brands are stored as integer codes into self.brands. sell_price is NaN for cars
+    without a sell price. Accepts both the CLI records (brand, buy_price, sell_price,
+    is_sold) and the Flask records (make, price, status). Days on lot are only
+    available when records carry added_on/sold_on day numbers, which current
+    records do not.
+    """
+
+    def __init__(self, brands, brand_codes, year, buy_price, sell_price, is_sold, days_on_lot=None):
+        self.brands = brands
+        self.brand_codes = brand_codes
+        self.year = year
+        self.buy_price = buy_price
+        self.sell_price = sell_price
+        self.is_sold = is_sold
+        self.days_on_lot = days_on_lot
+
+    @classmethod
+    def from_records(cls, records):
+        if np is None:
+            raise RuntimeError("numpy is required for inventory analytics")
+        records = records if isinstance(records, list) else list(records)
+        n = len(records)
+        if records and isinstance(records[0], Car):
+            return cls._from_cars(records)
+        # One schema per inventory: look at the first record instead of every one
+        flask_schema = bool(records) and "brand" not in records[0]
+        brand_key, price_key = ("make", "price") if flask_schema else ("brand", "buy_price")
+
+        brand_names = [car[brand_key] for car in records]
+        brand_index = {brand: code for code, brand in enumerate(dict.fromkeys(brand_names))}
+        if flask_schema:
+            sell_price = np.full(n, np.nan)
+            is_sold = np.fromiter((car.get("status") == "sold" for car in records), bool, n)
+        else:
+            # None becomes NaN when converting to a float array
+            sell_price = np.array([car.get("sell_price") for car in records], dtype=np.float64)
+            is_sold = np.fromiter(map(itemgetter("is_sold"), records), bool, n)
+        days_on_lot = None
+        if records and "added_on" in records[0]:
+            days_on_lot = np.array(
+                [None if car.get("sold_on") is None else car["sold_on"] - car["added_on"] for car in records],
+                dtype=np.float64)
+        return cls(
+            brands=list(brand_index),
+            brand_codes=np.fromiter(map(brand_index.__getitem__, brand_names), np.int32, n),
+            year=np.fromiter(map(itemgetter("year"), records), np.int32, n),
+            buy_price=np.fromiter((car[price_key] or 0 for car in records), np.float64, n),
+            sell_price=sell_price.reshape(n),
+            is_sold=is_sold,
+            days_on_lot=days_on_lot,
+        )
+
+    @classmethod
+    def _from_cars(cls, cars):
+        # Car attributes have the same names whatever schema the car came from
+        n = len(cars)
+        brand_names = list(map(attrgetter("brand"), cars))
+        brand_index = {brand: code for code, brand in enumerate(dict.fromkeys(brand_names))}
+        return cls(
+            brands=list(brand_index),
+            brand_codes=np.fromiter(map(brand_index.__getitem__, brand_names), np.int32, n),
+            year=np.fromiter(map(attrgetter("year"), cars), np.int32, n),
+            buy_price=np.fromiter((car.buy_price or 0 for car in cars), np.float64, n),
+            sell_price=np.array([getattr(car, "sell_price", None) for car in cars], dtype=np.float64).reshape(n),
+            is_sold=np.fromiter(map(attrgetter("is_sold"), cars), bool, n),
+        )
+
+    def __len__(self):
+        return len(self.year)
+
+    def _sold_mask(self):
+        return self.is_sold & ~np.isnan(self.sell_price)
+
+    def profit(self):
+        """Profit of every sold car that has a sell price."""
+        mask = self._sold_mask()
+        return self.sell_price[mask] - self.buy_price[mask]
+
+    def profit_percentiles(self, percentiles=PERCENTILES):
+        profit = self.profit()
+        if not len(profit):
+            return {}
+        values = np.percentile(profit, percentiles)
+        return {p: float(v) for p, v in zip(percentiles, values)}
+
+    def profit_histogram(self, bins=10):
+        """(counts, bin edges) of the profit distribution."""
+        profit = self.profit()
+        if not len(profit):
+            return [], []
+        counts, edges = np.histogram(profit, bins=bins)
+        return counts.tolist(), edges.tolist()
+
+    def _grouped(self, codes, labels):
+        mask = self._sold_mask()
+        codes = codes[mask]
+        sell = self.sell_price[mask]
+        profit = sell - self.buy_price[mask]
+        size = len(labels)
+        counts = np.bincount(codes, minlength=size)
+        profit_sum = np.bincount(codes, weights=profit, minlength=size)
+        sell_sum = np.bincount(codes, weights=sell, minlength=size)
+        rows = []
+        for i, label in enumerate(labels):
+            if not counts[i]:
+                continue
+            rows.append({
+                "group": label,
+                "sold": int(counts[i]),
+                "total_profit": round(float(profit_sum[i]), 2),
+                "average_profit": round(float(profit_sum[i] / counts[i]), 2),
+                "margin": round(float(profit_sum[i] / sell_sum[i]), 4) if sell_sum[i] else 0.0,
+            })
+        return rows
+
+    def margin_by_brand(self):
+        """Sold count, profit and margin (profit / sell price) per brand."""
+        rows = self._grouped(self.brand_codes, self.brands)
+        return sorted(rows, key=lambda row: row["group"])
+
+    def margin_by_year(self):
+        """Sold count, profit and margin (profit / sell price) per model year."""
+        years, codes = np.unique(self.year, return_inverse=True)
+        return self._grouped(codes.reshape(-1), [int(y) for y in years])
+
+    def average_days_on_lot(self):
+        if self.days_on_lot is None:
+            return None
+        days = self.days_on_lot[~np.isnan(self.days_on_lot)]
+        return float(days.mean()) if len(days) else None
+
+    def report(self):
+        return {
+            "cars": len(self),
+            "profit_percentiles": self.profit_percentiles(),
+            "margin_by_brand": self.margin_by_brand(),
+            "margin_by_year": self.margin_by_year(),
+            "average_days_on_lot": self.average_days_on_lot(),
+        }
@@ -1,9 +1,49 @@
-from flask import Flask, render_template_string, request, redirect, url_for, jsonify
-import json
+from flask import Flask, Response, g, request, redirect, url_for, jsonify, abort
+from flask.json.provider import DefaultJSONProvider
+from markupsafe import Markup
+import io
 import os
+import signal
+import sys
+import time
+from pathlib import Path
+
+# Import storage from project root when it is not next to this file
+try:
+    import storage
+except ImportError:
+    root = Path(__file__).resolve().parent.parent
+    if str(root) not in sys.path:
+        sys.path.insert(0, str(root))
+    import storage
+
+import batch
+import bulk
+import metrics
+import pages
+import profiling
+from car import Car
+from cache import FragmentCache
+from changes import ChangesExpired, event_stream, reset_event
+from export import ndjson_chunks, json_array_chunks
+from query import MAX_LIMIT, InventoryQuery, QueryError
+from search import DEFAULT_LIMIT
+from store import VersionConflict, open_store
+
+
+class CarJSONProvider(DefaultJSONProvider):
+    """jsonify() Car records as the dicts they stand for."""
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, Car):
+            return o.to_dict()
+        return DefaultJSONProvider.default(o)
 
 
 app = Flask(__name__)
+app.json = CarJSONProvider(app)
+
 DATA_FILE = os.environ.get('DATA_FILE', 'data/inventory.json')
 
 # Initial dummy data
@@ -15,394 +55,385 @@ INITIAL_DATA = [
     {"id": 5, "make": "BMW", "model": "X5", "year": 2022, "price": 58000, "status": "available"}
 ]
 
+# immediate: every change is written before the response. group: concurrent changes
+# share one write. interval: changes are acknowledged at once and written every
+# CARLOT_FLUSH_INTERVAL seconds. The last two need this process to be the only writer.
+DURABILITY = os.environ.get('CARLOT_DURABILITY', 'immediate')
+FLUSH_INTERVAL = float(os.environ['CARLOT_FLUSH_INTERVAL']) if os.environ.get('CARLOT_FLUSH_INTERVAL') else None
+
+# Resolved once for the process; the file is shared with the other replicas, see
+# VersionedStore. The Flask inventory keeps its own file and 4-space indentation
+# (or the binary format when DATA_FILE ends in .bin). CARLOT_STORAGE applies here
+# too: VersionedStore refuses the backends it cannot run on.
+storage_context = storage.resolve_context(DATA_FILE, serializer=storage.serializer_for(DATA_FILE, indent=4))
+storage.set_context(storage_context)
+store = open_store(storage_context, INITIAL_DATA, DURABILITY, FLUSH_INTERVAL)
+
+# Off unless CARLOT_PROFILE is "header" (requests sent with X-Profile set to
+# CARLOT_PROFILE_TOKEN, which is then required) or "all". CARLOT_PROFILE_REQUESTS
+# sums that many requests per route into one file under <data dir>/profiles;
+# CARLOT_PROFILE_ROUTES limits profiling to some route patterns.
+profiler = profiling.RequestProfiler.from_env(Path(storage_context.path).parent / 'profiles')
+
+def preload():
+    """Load the inventory and its stats up front; server.py forks its workers after this."""
+    version, inventory = store.snapshot()
+    inventory.stats()
+
+def _route():
+    return request.url_rule.rule if request.url_rule is not None else '<unmatched>'
+
+@app.before_request
+def _start_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def _record_request(response):
+    start = g.pop('request_start', None)
+    if start is not None:
+        # The route pattern, not the URL, so /sell/<car_id> is one series
+        route = _route()
+        metrics.REQUEST_SECONDS.observe(time.perf_counter() - start, request.method, route)
+        metrics.REQUESTS.inc(1, request.method, route, str(response.status_code))
+    return response
+
+@app.before_request
+def _start_profile():
+    if profiler.enabled and profiler.wanted(_route(), request.headers):
+        g.profile = profiler.start()
+
+@app.after_request
+def _finish_profile(response):
+    profile = g.pop('profile', None)
+    if profile is not None:
+        path = profiler.finish(profile, _route())
+        if path is not None:
+            response.headers['X-Profile-File'] = path.name
+    return response
+
+@app.teardown_request
+def _drop_profile(exc):
+    # after_request is skipped when a request fails hard; never leave the profiler busy
+    profile = g.pop('profile', None)
+    if profile is not None:
+        profiler.finish(profile, _route())
+
 def load_data():
-    if not os.path.exists(DATA_FILE):
-        # Ensure directory exists
-        os.makedirs(os.path.dirname(DATA_FILE), exist_ok=True)
-        save_data(INITIAL_DATA)
-        return INITIAL_DATA
+    """
+    Return the current inventory as a read-only snapshot shared between requests.
+    Changes go through store.update().
+    """
+    return store.snapshot().inventory
+
+def _if_match_version():
+    """The version a client based its change on, from an If-Match header, or None."""
+    value = request.headers.get('If-Match')
+    if not value or value.strip() == '*':
+        return None
+    value = value.split(',')[0].strip()
+    if value.startswith('W/'):
+        value = value[2:]
     try:
-        with open(DATA_FILE, 'r') as f:
-            return json.load(f)
-    except (json.JSONDecodeError, IOError):
-        return INITIAL_DATA
+        return int(value.strip('"'))
+    except ValueError:
+        abort(400, description="If-Match must be an inventory version")
 
-def save_data(data):
-    os.makedirs(os.path.dirname(DATA_FILE), exist_ok=True)
-    with open(DATA_FILE, 'w') as f:
-        json.dump(data, f, indent=4)
+def _apply(mutate):
+    """Commit mutate(inventory) and redirect to the dashboard, tagged with the new version."""
+    try:
+        version, _ = store.update(mutate, expected_version=_if_match_version())
+    except VersionConflict as e:
+        response = jsonify({"error": "Inventory has changed", "version": e.current})
+        response.status_code = 412
+        response.set_etag(str(e.current))
+        return response
+    response = redirect(url_for('index'))
+    response.set_etag(str(version))
+    return response
 
-@app.route('/')
-def index():
-    inventory = load_data()
+# Compiled once here instead of on every request
+index_page = app.jinja_env.from_string(pages.INDEX_PAGE)
+stats_fragment = app.jinja_env.from_string(pages.STATS_FRAGMENT)
+available_table_fragment = app.jinja_env.from_string(pages.AVAILABLE_TABLE_FRAGMENT)
+sold_section_fragment = app.jinja_env.from_string(pages.SOLD_SECTION_FRAGMENT)
+
+# Rendered fragments for the snapshot currently shown on the dashboard
+page_fragments = FragmentCache()
+
+def _render_fragments(inventory):
     available_cars = [car for car in inventory if car.get('status', 'available') == 'available']
     sold_cars = [car for car in inventory if car.get('status', 'available') == 'sold']
-    total_value = sum(car['price'] for car in available_cars)
-    
-    html = """
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <title>Car Lot Manager</title>
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <style>
-            * { margin: 0; padding: 0; box-sizing: border-box; }
-            body { 
-                font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-                background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                min-height: 100vh;
-                padding: 20px;
-            }
-            .container {
-                max-width: 1200px;
-                margin: 0 auto;
-                background: white;
-                border-radius: 12px;
-                box-shadow: 0 10px 40px rgba(0,0,0,0.2);
-                overflow: hidden;
-            }
-            .header {
-                background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                color: white;
-                padding: 30px;
-                text-align: center;
-            }
-            .header h1 {
-                font-size: 2.5em;
-                margin-bottom: 10px;
-            }
-            .stats {
-                display: flex;
-                justify-content: space-around;
-                padding: 20px;
-                background: #f8f9fa;
-                border-bottom: 2px solid #e9ecef;
-            }
-            .stat-box {
-                text-align: center;
-                padding: 15px;
-            }
-            .stat-number {
-                font-size: 2em;
-                font-weight: bold;
-                color: #667eea;
-            }
-            .stat-label {
-                color: #6c757d;
-                font-size: 0.9em;
-                margin-top: 5px;
-            }
-            .content {
-                padding: 30px;
-            }
-            .section {
-                margin-bottom: 40px;
-            }
-            .section-title {
-                font-size: 1.5em;
-                color: #333;
-                margin-bottom: 20px;
-                padding-bottom: 10px;
-                border-bottom: 3px solid #667eea;
-            }
-            .form-grid {
-                display: grid;
-                grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
-                gap: 15px;
-                margin-bottom: 20px;
-            }
-            .form-group {
-                display: flex;
-                flex-direction: column;
-            }
-            label {
-                font-weight: 600;
-                color: #495057;
-                margin-bottom: 5px;
-                font-size: 0.9em;
-            }
-            input {
-                padding: 10px;
-                border: 2px solid #e9ecef;
-                border-radius: 6px;
-                font-size: 1em;
-                transition: border-color 0.3s;
-            }
-            input:focus {
-                outline: none;
-                border-color: #667eea;
-            }
-            .btn {
-                padding: 12px 30px;
-                border: none;
-                border-radius: 6px;
-                font-size: 1em;
-                font-weight: 600;
-                cursor: pointer;
-                transition: all 0.3s;
-                text-decoration: none;
-                display: inline-block;
-            }
-            .btn-primary {
-                background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                color: white;
-            }
-            .btn-primary:hover {
-                transform: translateY(-2px);
-                box-shadow: 0 5px 15px rgba(102, 126, 234, 0.4);
-            }
-            .btn-danger {
-                background: #dc3545;
-                color: white;
-                padding: 8px 15px;
-                font-size: 0.85em;
-            }
-            .btn-danger:hover {
-                background: #c82333;
-            }
-            .btn-success {
-                background: #28a745;
-                color: white;
-                padding: 8px 15px;
-                font-size: 0.85em;
-            }
-            .btn-success:hover {
-                background: #218838;
-            }
-            table {
-                width: 100%;
-                border-collapse: collapse;
-                margin-top: 20px;
-                background: white;
-            }
-            th {
-                background: #f8f9fa;
-                color: #495057;
-                font-weight: 600;
-                padding: 15px;
-                text-align: left;
-                border-bottom: 2px solid #dee2e6;
-            }
-            td {
-                padding: 15px;
-                border-bottom: 1px solid #e9ecef;
-            }
-            tr:hover {
-                background: #f8f9fa;
-            }
-            .status-badge {
-                padding: 5px 12px;
-                border-radius: 20px;
-                font-size: 0.85em;
-                font-weight: 600;
-            }
-            .status-available {
-                background: #d4edda;
-                color: #155724;
-            }
-            .status-sold {
-                background: #f8d7da;
-                color: #721c24;
-            }
-            .action-buttons {
-                display: flex;
-                gap: 10px;
-            }
-            .empty-state {
-                text-align: center;
-                padding: 40px;
-                color: #6c757d;
-            }
-            .footer {
-                text-align: center;
-                padding: 20px;
-                background: #f8f9fa;
-                color: #6c757d;
-                font-size: 0.9em;
-            }
-            @media (max-width: 768px) {
-                .header h1 { font-size: 1.8em; }
-                .stats { flex-direction: column; }
-                .form-grid { grid-template-columns: 1fr; }
-                table { font-size: 0.9em; }
-                .action-buttons { flex-direction: column; }
-            }
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <div class="header">
-                <h1>🚗 Car Lot Manager</h1>
-                <p>Manage your inventory with ease</p>
-            </div>
-            
-            <div class="stats">
-                <div class="stat-box">
-                    <div class="stat-number">{{ available_cars|length }}</div>
-                    <div class="stat-label">Available Cars</div>
-                </div>
-                <div class="stat-box">
-                    <div class="stat-number">{{ sold_cars|length }}</div>
-                    <div class="stat-label">Sold Cars</div>
-                </div>
-                <div class="stat-box">
-                    <div class="stat-number">${{ "{:,}".format(total_value) }}</div>
-                    <div class="stat-label">Total Inventory Value</div>
-                </div>
-            </div>
-            
-            <div class="content">
-                <div class="section">
-                    <h2 class="section-title">➕ Add New Car</h2>
-                    <form action="/add" method="POST">
-                        <div class="form-grid">
-                            <div class="form-group">
-                                <label>Make</label>
-                                <input type="text" name="make" placeholder="e.g., Toyota" required>
-                            </div>
-                            <div class="form-group">
-                                <label>Model</label>
-                                <input type="text" name="model" placeholder="e.g., Camry" required>
-                            </div>
-                            <div class="form-group">
-                                <label>Year</label>
-                                <input type="number" name="year" placeholder="e.g., 2023" min="1900" max="2030" required>
-                            </div>
-                            <div class="form-group">
-                                <label>Price ($)</label>
-                                <input type="number" name="price" placeholder="e.g., 25000" min="0" required>
-                            </div>
-                        </div>
-                        <button type="submit" class="btn btn-primary">Add Car to Inventory</button>
-                    </form>
-                </div>
-                
-                <div class="section">
-                    <h2 class="section-title">📋 Available Inventory</h2>
-                    {% if available_cars %}
-                    <table>
-                        <thead>
-                            <tr>
-                                <th>ID</th>
-                                <th>Make</th>
-                                <th>Model</th>
-                                <th>Year</th>
-                                <th>Price</th>
-                                <th>Status</th>
-                                <th>Actions</th>
-                            </tr>
-                        </thead>
-                        <tbody>
-                            {% for car in available_cars %}
-                            <tr>
-                                <td><strong>#{{ car.id }}</strong></td>
-                                <td>{{ car.make }}</td>
-                                <td>{{ car.model }}</td>
-                                <td>{{ car.year }}</td>
-                                <td><strong>${{ "{:,}".format(car.price) }}</strong></td>
-                                <td><span class="status-badge status-available">Available</span></td>
-                                <td>
-                                    <div class="action-buttons">
-                                        <form action="/sell/{{ car.id }}" method="POST" style="display:inline;">
-                                            <button type="submit" class="btn btn-success">Sell</button>
-                                        </form>
-                                        <form action="/remove/{{ car.id }}" method="POST" style="display:inline;" onsubmit="return confirm('Are you sure you want to remove this car?');">
-                                            <button type="submit" class="btn btn-danger">Remove</button>
-                                        </form>
-                                    </div>
-                                </td>
-                            </tr>
-                            {% endfor %}
-                        </tbody>
-                    </table>
-                    {% else %}
-                    <div class="empty-state">
-                        <p>No cars available in inventory. Add some cars to get started!</p>
-                    </div>
-                    {% endif %}
-                </div>
-                
-                {% if sold_cars %}
-                <div class="section">
-                    <h2 class="section-title">✅ Sold Cars</h2>
-                    <table>
-                        <thead>
-                            <tr>
-                                <th>ID</th>
-                                <th>Make</th>
-                                <th>Model</th>
-                                <th>Year</th>
-                                <th>Price</th>
-                                <th>Status</th>
-                            </tr>
-                        </thead>
-                        <tbody>
-                            {% for car in sold_cars %}
-                            <tr>
-                                <td><strong>#{{ car.id }}</strong></td>
-                                <td>{{ car.make }}</td>
-                                <td>{{ car.model }}</td>
-                                <td>{{ car.year }}</td>
-                                <td><strong>${{ "{:,}".format(car.price) }}</strong></td>
-                                <td><span class="status-badge status-sold">Sold</span></td>
-                            </tr>
-                            {% endfor %}
-                        </tbody>
-                    </table>
-                </div>
-                {% endif %}
-            </div>
-            
-            <div class="footer">
-                <p>Car Lot Manager v1.0 | Data stored in: {{ data_file }}</p>
-            </div>
-        </div>
-    </body>
-    </html>
-    """
-    return render_template_string(html, inventory=inventory, available_cars=available_cars, 
-                                 sold_cars=sold_cars, total_value=total_value, data_file=DATA_FILE)
+    return {
+        "stats": Markup(stats_fragment.render(stats=inventory.stats())),
+        "available_table": Markup(available_table_fragment.render(available_cars=available_cars)),
+        "sold_section": Markup(sold_section_fragment.render(sold_cars=sold_cars)),
+    }
+
+@app.route('/')
+def index():
+    snapshot = store.snapshot()
+    fragments = page_fragments.get(snapshot, lambda: _render_fragments(snapshot.inventory))
+    return index_page.render(data_file=storage_context.path, **fragments)
 
 @app.route('/add', methods=['POST'])
 def add_car():
-    inventory = load_data()
-    new_id = max([c['id'] for c in inventory] or [0]) + 1
-    new_car = {
-        "id": new_id,
-        "make": request.form['make'],
-        "model": request.form['model'],
-        "year": int(request.form['year']),
-        "price": int(request.form['price']),
-        "status": "available"
-    }
-    inventory.append(new_car)
-    save_data(inventory)
-    return redirect(url_for('index'))
+    make = request.form['make']
+    model = request.form['model']
+    year = int(request.form['year'])
+    price = int(request.form['price'])
+
+    def mutate(inventory):
+        # The ID is allocated on the snapshot being committed, so a conflict retries
+        # with a fresh ID instead of two replicas handing out the same one
+        return inventory.add({
+            "id": inventory.next_id(),
+            "make": make,
+            "model": model,
+            "year": year,
+            "price": price,
+            "status": "available"
+        })
+    return _apply(mutate)
 
 @app.route('/sell/<int:car_id>', methods=['POST'])
 def sell_car(car_id):
-    inventory = load_data()
-    for car in inventory:
-        if car['id'] == car_id:
-            car['status'] = 'sold'
-            break
-    save_data(inventory)
-    return redirect(url_for('index'))
+    return _apply(lambda inventory: inventory.update(car_id, status='sold'))
 
 @app.route('/remove/<int:car_id>', methods=['POST'])
 def remove_car(car_id):
-    inventory = load_data()
-    inventory = [car for car in inventory if car['id'] != car_id]
-    save_data(inventory)
-    return redirect(url_for('index'))
+    return _apply(lambda inventory: inventory.remove(car_id))
+
+@app.route('/api/cars/import', methods=['POST'])
+def api_import_cars():
+    """
+    Add many cars from a CSV or NDJSON upload (multipart field "file" or the raw
+    request body) in one commit. Rows are checked like /add; an id column is
+    optional. With strict=1 a single bad row cancels the import.
+    """
+    upload = request.files.get('file')
+    if upload is not None:
+        stream, filename = upload.stream, upload.filename
+    else:
+        stream, filename = request.stream, None
+    fmt = request.args.get('format') or bulk.detect_format(filename, request.content_type)
+    if fmt not in bulk.FORMATS:
+        return jsonify({"error": "format must be csv or ndjson"}), 400
+    strict = request.args.get('strict') in ('1', 'true', 'yes')
+
+    rows = bulk.read_rows(io.TextIOWrapper(stream, encoding='utf-8', newline=''), fmt)
+    cars, errors = bulk.parse_rows(rows, bulk.parse_flask_car)
+    id_errors = []
+
+    def mutate(inventory):
+        # May run again on a newer snapshot after a conflict, so start afresh
+        id_errors.clear()
+        if strict and errors:
+            return None
+        added, duplicates = bulk.add_all(inventory, cars, strict=strict)
+        id_errors.extend(duplicates)
+        return added or None
+
+    try:
+        version, added = store.update(mutate, expected_version=_if_match_version())
+    except VersionConflict as e:
+        return jsonify({"error": "Inventory has changed", "version": e.current}), 412
+    rejected = sorted(errors + id_errors, key=lambda e: e["line"])
+    response = jsonify({"added": added or 0, "rejected": len(rejected), "errors": rejected,
+                        "version": version})
+    if rejected and not added:
+        response.status_code = 422
+    response.set_etag(str(version))
+    return response
+
+@app.route('/api/cars/batch', methods=['POST'])
+def api_cars_batch():
+    """
+    Apply a JSON list of add, sell and remove operations (see batch.py) in one
+    commit. Either every operation is applied or, if any fails, none is: the
+    response is 422 with the errors and the inventory is unchanged.
+    """
+    try:
+        operations, errors = batch.parse_operations(request.get_json(silent=True))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    outcome = {}
+
+    def mutate(inventory):
+        # May run again on a newer snapshot after a conflict
+        if errors:
+            return None
+        outcome["results"], outcome["errors"] = batch.apply_operations(inventory, operations)
+        if outcome["errors"]:
+            return None
+        return outcome["results"] or None
+
+    try:
+        version, applied = store.update(mutate, expected_version=_if_match_version())
+    except VersionConflict as e:
+        return jsonify({"error": "Inventory has changed", "version": e.current}), 412
+    failed = sorted(errors + outcome.get("errors", []), key=lambda e: e["index"])
+    if failed:
+        response = jsonify({"applied": False, "errors": failed, "version": version})
+        response.status_code = 422
+    else:
+        response = jsonify({"applied": True, "results": applied or [], "version": version})
+    response.set_etag(str(version))
+    return response
 
 @app.route('/api/inventory')
 def api_inventory():
-    return jsonify(load_data())
+    """
+    Inventory as a JSON list. Optional query parameters: status, make, min_year,
+    max_year, min_price, max_price, fields=id,price and limit/after for paging. When
+    more results remain, a Link header with rel="next" points to the next page.
+    """
+    version, inventory = store.snapshot()
+    if not request.args:
+        response = jsonify(inventory.to_list())
+    else:
+        try:
+            query = InventoryQuery.from_args(request.args)
+        except QueryError as e:
+            return jsonify({"error": str(e)}), 400
+        page, next_after = query.run(inventory)
+        response = jsonify(page)
+        if next_after is not None:
+            args = request.args.to_dict()
+            args['after'] = next_after
+            response.headers['Link'] = f'<{url_for("api_inventory", **args)}>; rel="next"'
+    response.set_etag(str(version))
+    return response
+
+@app.route('/api/search')
+def api_search():
+    """
+    Cars whose make and model match every word of q, as a prefix or with a typo,
+    in ID order. Optional limit (default 20).
+    """
+    q = request.args.get('q', '').strip()
+    if not q:
+        return jsonify({"error": "q is required"}), 400
+    try:
+        limit = int(request.args.get('limit') or DEFAULT_LIMIT)
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    if not 1 <= limit <= MAX_LIMIT:
+        return jsonify({"error": f"limit must be between 1 and {MAX_LIMIT}"}), 400
+    version, inventory = store.snapshot()
+    response = jsonify(inventory.search(q, limit))
+    response.set_etag(str(version))
+    return response
+
+@app.route('/api/stats')
+def api_stats():
+    """Inventory totals, maintained as cars change instead of computed per request."""
+    version, inventory = store.snapshot()
+    response = jsonify(inventory.stats().to_dict())
+    response.set_etag(str(version))
+    return response
+
+@app.route('/api/stats/histograms')
+def api_stats_histograms():
+    """Cars per model year and per price bucket, read off the range indexes."""
+    version, inventory = store.snapshot()
+    response = jsonify({
+        "year": inventory.range_index("year").histogram(),
+        "price": inventory.range_index("buy_price").histogram(),
+    })
+    response.set_etag(str(version))
+    return response
+
+@app.route('/api/inventory/export')
+def api_inventory_export():
+    """
+    Whole inventory streamed as NDJSON (default) or, with format=json, as a JSON
+    array sent in chunks. Accepts the same filters and fields as /api/inventory.
+    The response is generated from one snapshot while it is being sent, so memory
+    use does not grow with the inventory.
+    """
+    args = request.args.to_dict()
+    output = args.pop('format', 'ndjson')
+    if output not in ('ndjson', 'json'):
+        return jsonify({"error": "format must be ndjson or json"}), 400
+    try:
+        query = InventoryQuery.from_args(args)
+    except QueryError as e:
+        return jsonify({"error": str(e)}), 400
+    version, inventory = store.snapshot()
+    cars = (query.project(car) for car in query.iter_matches(inventory))
+    if output == 'json':
+        response = Response(json_array_chunks(cars), mimetype='application/json')
+    else:
+        response = Response(ndjson_chunks(cars), mimetype='application/x-ndjson')
+    response.set_etag(str(version))
+    return response
+
+@app.route('/api/changes')
+def api_changes():
+    """
+    The changes committed after version since (the ETag of an earlier response),
+    oldest first: {"version": latest, "changes": [{"version": n, "changes": [...]}]}
+    with each change {"op": "put", "car": {...}} or {"op": "del", "id": n}. 410 when
+    they are no longer kept, or since is newer than the inventory (a version lost
+    in a crash); fetch /api/inventory again then.
+    """
+    try:
+        since = int(request.args['since'])
+    except (KeyError, ValueError):
+        return jsonify({"error": "since must be an integer version"}), 400
+    current = store.snapshot().version
+    try:
+        if since > current:
+            raise ChangesExpired(since, None)
+        entries = store.changes.since(since)
+    except ChangesExpired:
+        return jsonify({"error": "Changes are no longer available", "version": current}), 410
+    version = entries[-1]["version"] if entries else since
+    response = jsonify({"version": version, "changes": entries})
+    response.set_etag(str(version))
+    return response
+
+@app.route('/api/changes/stream')
+def api_changes_stream():
+    """
+    Server-Sent Events pushing each change as it is committed, starting after
+    since (or the Last-Event-ID a reconnecting browser sends; by default, now).
+    """
+    since = request.args.get('since') or request.headers.get('Last-Event-ID')
+    current = store.snapshot().version
+    try:
+        since = current if since is None else int(since)
+    except ValueError:
+        return jsonify({"error": "since must be an integer version"}), 400
+    # A since newer than the inventory names a version lost in a crash
+    events = [reset_event(since)] if since > current else event_stream(store.changes, since)
+    response = Response(events, mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    # Keep reverse proxies from buffering the stream
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
 
 @app.route('/health')
 def health():
-    return jsonify({"status": "healthy"}), 200
+    return jsonify({"status": "healthy", "cache": store.cache.stats(),
+                    "page_cache": page_fragments.stats()}), 200
+
+@metrics.registry.collector
+def collect_metrics():
+    version, inventory = store.snapshot()
+    metrics.INVENTORY_CARS.set(len(inventory))
+    metrics.INVENTORY_VERSION.set(version)
+    for name, stats in (("file", store.cache.stats()), ("page", page_fragments.stats())):
+        metrics.CACHE_HITS.set(stats["hits"], name)
+        metrics.CACHE_MISSES.set(stats["misses"], name)
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Request, storage, lock and cache metrics in the Prometheus text format."""
+    return Response(metrics.registry.render(), mimetype=metrics.CONTENT_TYPE)
 
 if __name__ == '__main__':
+    # Development server; run server.py in production
+    # Exit normally on SIGTERM (docker stop) so pending writes are flushed at exit
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
     app.run(host='0.0.0.0', port=5000)
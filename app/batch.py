@@ -0,0 +1,75 @@
+from bulk import parse_flask_car
+
+OPERATIONS = ("add", "sell", "remove")
+MAX_OPERATIONS = 10000
+
+
+def parse_operations(body):
+    """
+    Check a batch request body: a JSON list of {"op": "add", "car": {...}},
+    {"op": "sell", "id": n} or {"op": "remove", "id": n} (or {"operations": [...]}).
+    Returns (operations, errors); each error is {"index": i, "error": message}.
+    """
+    if isinstance(body, dict):
+        body = body.get("operations")
+    if not isinstance(body, list):
+        raise ValueError("Expected a list of operations")
+    if len(body) > MAX_OPERATIONS:
+        raise ValueError(f"At most {MAX_OPERATIONS} operations per batch")
+    operations, errors = [], []
+    for index, operation in enumerate(body):
+        try:
+            operations.append(_parse_operation(index, operation))
+        except ValueError as e:
+            errors.append({"index": index, "error": str(e)})
+    return operations, errors
+
+
+def _parse_operation(index, operation):
+    if not isinstance(operation, dict):
+        raise ValueError("Not a JSON object")
+    op = operation.get("op")
+    if op not in OPERATIONS:
+        raise ValueError(f"op must be one of: {', '.join(OPERATIONS)}")
+    if op == "add":
+        car = operation.get("car")
+        if not isinstance(car, dict):
+            raise ValueError("add needs a car object")
+        return index, op, parse_flask_car(car)
+    car_id = operation.get("id")
+    if isinstance(car_id, bool) or not isinstance(car_id, int):
+        raise ValueError(f"{op} needs an integer id")
+    return index, op, car_id
+
+
+def apply_operations(inventory, operations):
+    """
+    Apply parsed operations to inventory in order; later operations see the
+    effects of earlier ones (a car added in the batch can be sold in it). Returns
+    (results, errors): one {"index", "op", "id"} per operation that succeeded and
+    {"index", "error"} per one that did not. The caller commits only when errors
+    is empty, which is what makes the batch all-or-nothing.
+    """
+    results, errors = [], []
+    for index, op, value in operations:
+        if op == "add":
+            car = value
+            if car["id"] is None:
+                car = {**car, "id": inventory.next_id()}
+            elif car["id"] in inventory:
+                errors.append({"index": index, "error": f"Car ID {car['id']} already exists."})
+                continue
+            inventory.add(car)
+            car_id = car["id"]
+        elif op == "sell":
+            car_id = value
+            if inventory.update(car_id, status="sold") is None:
+                errors.append({"index": index, "error": f"Car {car_id} not found"})
+                continue
+        else:
+            car_id = value
+            if inventory.remove(car_id) is None:
+                errors.append({"index": index, "error": f"Car {car_id} not found"})
+                continue
+        results.append({"index": index, "op": op, "id": car_id})
+    return results, errors
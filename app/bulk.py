@@ -0,0 +1,141 @@
+import csv
+import json
+
+FORMATS = ("csv", "ndjson")
+
+
+def detect_format(filename, content_type=None):
+    """Guess csv/ndjson from a file name or Content-Type; None when unknown."""
+    name = (filename or "").lower()
+    if name.endswith(".csv") or (content_type or "").startswith("text/csv"):
+        return "csv"
+    if name.endswith((".ndjson", ".jsonl")) or "ndjson" in (content_type or ""):
+        return "ndjson"
+    return None
+
+
+def read_rows(stream, fmt):
+    """Yield (line number, row dict) from a text stream of CSV (with header) or NDJSON."""
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+    elif fmt == "ndjson":
+        for line_num, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            yield line_num, row
+    else:
+        raise ValueError(f"Unknown format: {fmt}")
+
+
+def _field(row, name):
+    value = row.get(name)
+    if value is None or (isinstance(value, str) and not value.strip()):
+        raise ValueError(f"Missing {name}")
+    return value.strip() if isinstance(value, str) else value
+
+
+def _brand(value, name):
+    if not str(value).isalpha():
+        raise ValueError(f"{name.capitalize()} must contain only letters.")
+    return str(value)
+
+
+def _price(value, name, convert):
+    try:
+        price = convert(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid {name}: {value!r}")
+    if price < 0:
+        raise ValueError(f"{name} cannot be negative.")
+    return price
+
+
+def _int(value, name):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid {name}: {value!r}")
+
+
+def parse_cli_car(row):
+    """A storage/CLI record from a row, checked with the same rules as add_car()."""
+    return {
+        "id": _int(_field(row, "id"), "id"),
+        "brand": _brand(_field(row, "brand"), "brand"),
+        "model": str(_field(row, "model")),
+        "year": _int(_field(row, "year"), "year"),
+        "buy_price": _price(_field(row, "buy_price"), "buy_price", float),
+        "sell_price": None,
+        "is_sold": False,
+    }
+
+
+def parse_flask_car(row):
+    """A Flask record from a row. The id column is optional; missing IDs are allocated."""
+    car_id = row.get("id")
+    return {
+        "id": None if car_id in (None, "") else _int(car_id, "id"),
+        "make": _brand(_field(row, "make"), "make"),
+        "model": str(_field(row, "model")),
+        "year": _int(_field(row, "year"), "year"),
+        "price": _price(_field(row, "price"), "price", int),
+        "status": "available",
+    }
+
+
+def parse_rows(rows, parse):
+    """
+    Check every row on its own. Returns (list of (line, car), list of errors); each
+    error is {"line": n, "error": message}. Rows are read one at a time, but every
+    parsed car is kept: add_all() needs them all to find duplicate IDs before adding
+    any, and a store update may run it more than once.
+    """
+    cars, errors = [], []
+    for line, row in rows:
+        if not isinstance(row, dict):
+            errors.append({"line": line, "error": "Not a JSON object"})
+            continue
+        try:
+            cars.append((line, parse(row)))
+        except ValueError as e:
+            errors.append({"line": line, "error": str(e)})
+    return cars, errors
+
+
+def add_all(inventory, cars, strict=False):
+    """
+    Add parsed cars to inventory, allocating IDs for cars without one. Rows whose ID
+    is already taken (in the inventory or earlier in the file) are reported instead;
+    with strict=True such a row means nothing is added. Returns (added, errors).
+    """
+    errors = []
+    rejected = set()
+    seen = set()
+    for line, car in cars:
+        car_id = car["id"]
+        if car_id is None:
+            continue
+        if car_id in seen or car_id in inventory:
+            errors.append({"line": line, "error": f"Car ID {car_id} already exists."})
+            rejected.add(line)
+        seen.add(car_id)
+    if strict and errors:
+        return 0, errors
+    # Allocated IDs start above every ID in the file, so they never collide with a
+    # row further down
+    floor = max(seen, default=0) + 1
+    added = 0
+    for line, car in cars:
+        if line in rejected:
+            continue
+        if car["id"] is None:
+            car = {**car, "id": max(inventory.next_id(), floor)}
+        inventory.add(car)
+        added += 1
+    return added, errors
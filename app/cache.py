@@ -0,0 +1,109 @@
+import os
+import threading
+
+
+def file_signature(path):
+    """
+    Cheap identity of a file's current contents: (mtime_ns, size, inode).
+    Returns None when the file does not exist.
+    """
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+class FileCache:
+    """
+    Keeps the parsed contents of a file in memory and revalidates them with a stat.
+
+    A hit costs one os.stat() instead of reading and parsing the file. Any change to
+    the mtime, size or inode (for example a write by another replica on the shared
+    volume, which replaces or rewrites the file) causes the next get() to reload.
+    """
+
+    def __init__(self, loader):
+        self._loader = loader
+        self._lock = threading.Lock()
+        self._path = None
+        self._signature = None
+        self._value = None
+        self._token = None
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path, token=None):
+        """
+        Return the parsed file. token is an extra value the cached entry must match,
+        such as a version number kept outside the file.
+        """
+        signature = file_signature(path)
+        with self._lock:
+            if (signature is not None and path == self._path and signature == self._signature
+                    and token == self._token):
+                self.hits += 1
+                return self._value
+            self.misses += 1
+        # Parse outside the lock; the signature was taken before reading, so a write
+        # that lands while we parse just makes the next get() reload again.
+        value = self._loader(path)
+        with self._lock:
+            self._path, self._signature, self._value, self._token = path, signature, value, token
+        return value
+
+    def put(self, path, value, token=None):
+        """Remember a value we just wrote ourselves, so the next read is a hit."""
+        signature = file_signature(path)
+        with self._lock:
+            self._path, self._signature, self._value, self._token = path, signature, value, token
+
+    def invalidate(self):
+        with self._lock:
+            self._path = self._signature = self._value = self._token = None
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            }
+
+
+class FragmentCache:
+    """
+    Rendered output for one inventory snapshot.
+
+    Snapshots are immutable and a new one is published on every change, so output
+    rendered for a snapshot stays valid for as long as that snapshot is current.
+    Only the latest snapshot's output is kept.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._value = None
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, snapshot, render):
+        with self._lock:
+            if snapshot is self._snapshot:
+                self.hits += 1
+                return self._value
+            self.misses += 1
+        value = render()
+        with self._lock:
+            self._snapshot, self._value = snapshot, value
+        return value
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            }
@@ -0,0 +1,37 @@
+import json
+
+from car import to_json
+
+# Records per chunk handed to the WSGI server; small enough to keep memory flat,
+# large enough that per-chunk overhead does not dominate.
+CHUNK_SIZE = 500
+
+_encode = json.JSONEncoder(separators=(',', ':'), default=to_json).encode
+
+
+def ndjson_chunks(cars, chunk_size=CHUNK_SIZE):
+    """Yield the cars as newline-delimited JSON, chunk_size records at a time."""
+    batch = []
+    for car in cars:
+        batch.append(_encode(car))
+        if len(batch) == chunk_size:
+            yield '\n'.join(batch) + '\n'
+            batch = []
+    if batch:
+        yield '\n'.join(batch) + '\n'
+
+
+def json_array_chunks(cars, chunk_size=CHUNK_SIZE):
+    """Yield one JSON array of the cars in pieces; the opening bracket goes out first."""
+    yield '['
+    separator = ''
+    batch = []
+    for car in cars:
+        batch.append(_encode(car))
+        if len(batch) == chunk_size:
+            yield separator + ','.join(batch)
+            separator = ','
+            batch = []
+    if batch:
+        yield separator + ','.join(batch)
+    yield ']\n'
@@ -1,10 +1,13 @@
 import storage
+import bulk
+import analytics
+import views
 
 
 def add_car(inventory):
     try:
         car_id = int(input("ID: "))
-        if any(car['id'] == car_id for car in inventory):
+        if car_id in inventory:
             print("Car ID already exists. Choose a different ID.")
             return
         brand = input("Brand: ")
@@ -17,7 +20,7 @@ def add_car(inventory):
         if buy_price < 0:
             print("Buy Price cannot be negative.")
             return
-        inventory.append({
+        inventory.add({
             "id": car_id,
             "brand": brand,
             "model": model,
@@ -33,29 +36,26 @@ def add_car(inventory):
 
 def sell_car(inventory):
     car_id = input("Enter ID to mark as sold: ")
-    for car in inventory:
-        if str(car["id"]) == car_id:
-            if car["is_sold"]:
-                print("This car is already sold.")
-                return
-            try:
-                sell_price = float(input("Sell Price: "))
-                car["sell_price"] = sell_price
-                car["is_sold"] = True
-                profit = sell_price - car["buy_price"]
-                print(f"Car sold. Profit: {profit:.2f}")
-                storage.save_inventory(inventory)
-                return
-            except ValueError:
-                print("Invalid price.")
-                return
-    print("Car not found.")
+    car = inventory.get(car_id)
+    if car is None:
+        print("Car not found.")
+        return
+    if car["is_sold"]:
+        print("This car is already sold.")
+        return
+    try:
+        sell_price = float(input("Sell Price: "))
+    except ValueError:
+        print("Invalid price.")
+        return
+    inventory.update(car_id, sell_price=sell_price, is_sold=True)
+    profit = sell_price - car["buy_price"]
+    print(f"Car sold. Profit: {profit:.2f}")
+    storage.save_inventory(inventory)
 
 def remove_car(inventory):
     car_id = input("Enter ID to remove: ")
-    before = len(inventory)
-    inventory[:] = [car for car in inventory if str(car['id']) != car_id]
-    if len(inventory) < before:
+    if inventory.remove(car_id) is not None:
         storage.save_inventory(inventory)
         print("Removed.")
     else:
@@ -63,64 +63,138 @@ def remove_car(inventory):
 
 def edit_car(inventory):
     car_id = input("Enter ID to edit: ")
-    for car in inventory:
-        if str(car['id']) == car_id:
-            brand = input("New Brand: ")
-            if not brand.isalpha():
-                print("Brand must contain only letters.")
-                return
-            car['brand'] = brand
-            car['model'] = input("New Model: ")
-            try:
-                year = int(input("New Year: "))
-                buy_price = float(input("New Buy Price: "))
-                if buy_price < 0:
-                    print("Buy Price cannot be negative.")
-                    return
-                car['year'] = year
-                car['buy_price'] = buy_price
-                if car['is_sold']:
-                    car['sell_price'] = float(input("New Sell Price: "))
-                storage.save_inventory(inventory)
-                print("Car updated.")
-            except ValueError:
-                print("Invalid input.")
+    car = inventory.get(car_id)
+    if car is None:
+        print("Car not found.")
+        return
+    brand = input("New Brand: ")
+    if not brand.isalpha():
+        print("Brand must contain only letters.")
+        return
+    model = input("New Model: ")
+    try:
+        year = int(input("New Year: "))
+        buy_price = float(input("New Buy Price: "))
+        if buy_price < 0:
+            print("Buy Price cannot be negative.")
             return
-    print("Car not found.")
+        changes = {"brand": brand, "model": model, "year": year, "buy_price": buy_price}
+        if car['is_sold']:
+            changes["sell_price"] = float(input("New Sell Price: "))
+    except ValueError:
+        print("Invalid input.")
+        return
+    inventory.update(car_id, **changes)
+    storage.save_inventory(inventory)
+    print("Car updated.")
+
+SORT_FIELDS = ("id", "brand", "model", "year", "buy_price", "sell_price", "is_sold")
+
+def _print_car(car):
+    status = "Sold" if car["is_sold"] else "Available"
+    print(f"{car['id']} | {car['brand']} {car['model']} | {car['year']} | Buy: {car['buy_price']} | Status: {status} | Sell: {car['sell_price']}")
 
 def display_cars(inventory):
     if not inventory:
         print("No cars.")
         return
     for car in inventory:
-        status = "Sold" if car["is_sold"] else "Available"
-        print(f"{car['id']} | {car['brand']} {car['model']} | {car['year']} | Buy: {car['buy_price']} | Status: {status} | Sell: {car['sell_price']}")
+        _print_car(car)
 
 def sort_cars(inventory):
+    """Show the cars sorted by one or more keys; the stored order is left alone."""
     if not inventory:
         print("No cars to sort.")
         return
-    key = input("Sort by (id, brand, year, buy_price, sell_price): ")
-    if key not in inventory[0]:
+    text = input(f"Sort by ({', '.join(SORT_FIELDS)}; e.g. brand,-year for year descending): ")
+    try:
+        spec = views.parse_sort_spec(text)
+    except ValueError:
         print("Invalid key.")
         return
-    inventory.sort(key=lambda x: x[key] if x[key] is not None else 0)
-    storage.save_inventory(inventory)
-    print("Sorted.")
+    if any(field not in SORT_FIELDS for field, _ in spec):
+        print("Invalid key.")
+        return
+    for car in inventory.sorted_by(spec):
+        _print_car(car)
+
+def search_cars(inventory):
+    query = input("Search brand/model: ")
+    cars = inventory.search(query)
+    if not cars:
+        print("No matching cars.")
+        return
+    for car in cars:
+        _print_car(car)
+
+def _optional_number(prompt, kind):
+    text = input(prompt).strip()
+    return kind(text) if text else None
+
+def find_cars(inventory):
+    """List the cars within a year and buy price range; blank answers leave that end open."""
+    try:
+        min_year = _optional_number("From year (blank for any): ", int)
+        max_year = _optional_number("To year (blank for any): ", int)
+        min_price = _optional_number("Min buy price (blank for any): ", float)
+        max_price = _optional_number("Max buy price (blank for any): ", float)
+    except ValueError:
+        print("Invalid input.")
+        return
+    cars = inventory.between(year=(min_year, max_year), buy_price=(min_price, max_price))
+    if not cars:
+        print("No matching cars.")
+        return
+    for car in cars:
+        _print_car(car)
 
 def show_stats(inventory):
     if not inventory:
         print("No data.")
         return
-    sold = [car for car in inventory if car["is_sold"]]
-    total = len(inventory)
-    total_profit = sum(c["sell_price"] - c["buy_price"] for c in sold)
-    avg_profit = total_profit / len(sold) if sold else 0
-    avg_buy = sum(c["buy_price"] for c in inventory) / total
-
-    print(f"Total Cars: {total}")
-    print(f"Sold Cars: {len(sold)}")
-    print(f"Unsold Cars: {total - len(sold)}")
-    print(f"Average Buy Price: {avg_buy:.2f}")
-    print(f"Total Profit: {total_profit:.2f}")
-    print(f"Average Profit per Sold Car: {avg_profit:.2f}")
+    stats = inventory.stats()
+
+    print(f"Total Cars: {stats.total}")
+    print(f"Sold Cars: {stats.sold}")
+    print(f"Unsold Cars: {stats.unsold}")
+    print(f"Average Buy Price: {stats.average_buy_price:.2f}")
+    print(f"Total Profit: {stats.profit_sum:.2f}")
+    print(f"Average Profit per Sold Car: {stats.average_profit:.2f}")
+
+    if not analytics.available():
+        print("Install numpy (see requirements.txt) for profit percentiles and margins by brand and year.")
+        return
+    report = analytics.InventoryColumns.from_records(inventory).report()
+    if report["profit_percentiles"]:
+        print("Profit percentiles: " + ", ".join(
+            f"p{p}={value:.2f}" for p, value in report["profit_percentiles"].items()))
+    for title, key in (("Brand", "margin_by_brand"), ("Year", "margin_by_year")):
+        if report[key]:
+            print(f"\nMargin by {title}:")
+        for row in report[key]:
+            print(f"{row['group']}: {row['sold']} sold, profit {row['total_profit']:.2f}, "
+                  f"margin {row['margin']:.1%}")
+
+def import_cars(inventory, path, fmt=None, strict=False):
+    """
+    Add every car in a CSV or NDJSON file and save once at the end.
+    Rows that break the add_car() rules are reported and skipped; with strict=True
+    any bad row cancels the whole import.
+    """
+    fmt = fmt or bulk.detect_format(path)
+    if fmt not in bulk.FORMATS:
+        print("Unknown file format. Use a .csv or .ndjson file, or pass the format.")
+        return 0
+    with open(path, "r", encoding="utf-8", newline="") as fh:
+        cars, errors = bulk.parse_rows(bulk.read_rows(fh, fmt), bulk.parse_cli_car)
+    if strict and errors:
+        added = 0
+    else:
+        added, id_errors = bulk.add_all(inventory, cars, strict=strict)
+        errors += id_errors
+    for error in sorted(errors, key=lambda e: e["line"]):
+        print(f"Line {error['line']}: {error['error']}")
+    if added:
+        storage.save_inventory(inventory)
+    print(f"Imported {added} cars, {len(errors)} rows rejected.")
+    return added
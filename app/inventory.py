@@ -0,0 +1,252 @@
+import threading
+import warnings
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from car import Car
+from ranges import RangeIndex
+from search import DEFAULT_LIMIT, SearchIndex
+from stats import InventoryStats
+from views import SortedView, SortSpec
+
+
+def normalize_id(car_id) -> Optional[int]:
+    """
+    Turn a car ID coming from input(), a URL or a record into the int used as index key.
+    Returns None when the value is not a valid ID.
+    """
+    if isinstance(car_id, bool):
+        return None
+    if isinstance(car_id, int):
+        return car_id
+    try:
+        return int(str(car_id).strip())
+    except ValueError:
+        return None
+
+
+def _within(value, lo, hi) -> bool:
+    return value is not None and (lo is None or value >= lo) and (hi is None or value <= hi)
+
+
+class Inventory:
+    """
+    Ordered collection of car records indexed by ID.
+
+    Records are kept in an insertion-ordered dict keyed on the car ID, so lookups,
+    inserts, updates and removals are O(1) and iteration still follows the order
+    the cars were added in. The next free ID is tracked as cars are added, so
+    allocating one never scans the inventory.
+
+    Records are stored as Car objects (see car.py), which read like the dicts they
+    were added as; to_list() gives the dicts back.
+
+    Records passed to the constructor come from storage, where two cars can share an
+    ID (replicas that both handed out the same next ID): the later one is given a
+    fresh ID, with a warning, instead of failing the whole load. add() still rejects
+    an ID that is taken.
+
+    Changes made after construction are remembered as ("put", record) and
+    ("del", car_id) entries until drain_changes() is called, so storage can persist
+    just what changed instead of rewriting the whole inventory.
+
+    freeze() turns an inventory into a read-only snapshot that can be shared between
+    threads; changes are then made on a copy(), which shares the unchanged records.
+
+    Derived structures such as stats() register as observers: they are built once
+    from the records and then told about every added and removed record (a change
+    is a removal of the old record plus an addition of the new one).
+    """
+
+    def __init__(self, records: Iterable[Dict[str, Any]] = ()):
+        self._by_id: Dict[int, Dict[str, Any]] = {}
+        self._next_id = 1
+        self._changes: List[Tuple[str, Any]] = []
+        self._frozen = False
+        self._sorted_ids: Optional[List[int]] = None
+        self._observers: Dict[str, Any] = {}
+        # Readers may register observers on a shared snapshot while a writer copies it;
+        # reentrant, as a factory may ask for another observer
+        self._observer_lock = threading.RLock()
+        duplicates = []
+        for record in records:
+            if normalize_id(record.get("id")) in self._by_id:
+                duplicates.append(record)
+            else:
+                self.add(record)
+        # After every other car, so the fresh IDs are above all of theirs
+        for record in duplicates:
+            car_id = self._next_id
+            warnings.warn(f"Car ID {record['id']} appears more than once; loading the later car as ID {car_id}")
+            self.add({**record, "id": car_id})
+        self._changes = []
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def __iter__(self) -> Iterator[Car]:
+        return iter(self._by_id.values())
+
+    def __contains__(self, car_id) -> bool:
+        return normalize_id(car_id) in self._by_id
+
+    def __getitem__(self, position: int) -> Car:
+        # Positional access is only meant for small inventories and tests.
+        return list(self._by_id.values())[position]
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, Inventory):
+            return self.to_list() == other.to_list()
+        if isinstance(other, list):
+            return self.to_list() == other
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"Inventory({self.to_list()!r})"
+
+    def get(self, car_id) -> Optional[Car]:
+        return self._by_id.get(normalize_id(car_id))
+
+    def sorted_ids(self) -> List[int]:
+        """All IDs in ascending order, cached until the next add or remove."""
+        if self._sorted_ids is None:
+            self._sorted_ids = sorted(self._by_id)
+        return self._sorted_ids
+
+    def next_id(self) -> int:
+        return self._next_id
+
+    def add(self, record: Dict[str, Any]) -> Car:
+        self._check_writable()
+        record = Car.from_dict(record)
+        car_id = normalize_id(getattr(record, "id", None))
+        if car_id is None:
+            raise ValueError(f"Invalid car ID: {getattr(record, 'id', None)!r}")
+        if car_id in self._by_id:
+            raise ValueError(f"Car ID {car_id} already exists.")
+        self._by_id[car_id] = record
+        self._sorted_ids = None
+        if car_id >= self._next_id:
+            self._next_id = car_id + 1
+        self._record_change("put", record)
+        for observer in self._observers.values():
+            observer.added(record)
+        return record
+
+    def update(self, car_id, **fields) -> Optional[Car]:
+        # Replace the record instead of changing it in place, so copies of this
+        # inventory that share the old record are not affected.
+        self._check_writable()
+        key = normalize_id(car_id)
+        record = self._by_id.get(key)
+        if record is None:
+            return None
+        old, record = record, record.replace(**fields)
+        self._by_id[key] = record
+        self._record_change("put", record)
+        for observer in self._observers.values():
+            observer.removed(old)
+            observer.added(record)
+        return record
+
+    def remove(self, car_id) -> Optional[Car]:
+        self._check_writable()
+        key = normalize_id(car_id)
+        record = self._by_id.pop(key, None)
+        if record is not None:
+            self._sorted_ids = None
+            self._record_change("del", key)
+            for observer in self._observers.values():
+                observer.removed(record)
+        return record
+
+    def copy(self) -> "Inventory":
+        clone = Inventory()
+        clone._by_id = dict(self._by_id)
+        clone._next_id = self._next_id
+        clone._sorted_ids = self._sorted_ids
+        with self._observer_lock:
+            observers = list(self._observers.items())
+        clone._observers = {name: observer.copy() for name, observer in observers}
+        clone._changes = list(self._changes)
+        return clone
+
+    def observer(self, name: str, factory):
+        """
+        Return the observer registered under name, building it with factory(self)
+        the first time. Observers need added(record), removed(record) and copy().
+        Registering one on a frozen snapshot is allowed, as it does not change the cars;
+        threads asking for the same one at once wait for a single build.
+        """
+        observer = self._observers.get(name)
+        if observer is None:
+            with self._observer_lock:
+                observer = self._observers.get(name)
+                if observer is None:
+                    observer = self._observers[name] = factory(self)
+        return observer
+
+    def stats(self) -> InventoryStats:
+        """Counts and totals, kept up to date as the inventory changes."""
+        return self.observer("stats", InventoryStats)
+
+    def search(self, query: str, limit: int = DEFAULT_LIMIT) -> List[Car]:
+        """Cars whose brand/make and model match every word of query (see SearchIndex)."""
+        by_id = self._by_id
+        return [by_id[car_id] for car_id in self.observer("search", SearchIndex).search(query, limit)]
+
+    def sorted_view(self, spec: SortSpec) -> SortedView:
+        """The cars' order under spec (see views.parse_sort_spec), cached per spec."""
+        name = "sorted:" + ",".join(("-" if descending else "") + field for field, descending in spec)
+        return self.observer(name, lambda inventory: SortedView(spec, inventory))
+
+    def sorted_by(self, spec: SortSpec) -> List[Car]:
+        """The cars ordered by spec, without changing the inventory's own order."""
+        by_id = self._by_id
+        return [by_id[car_id] for car_id in self.sorted_view(spec).ids()]
+
+    def range_index(self, field: str) -> RangeIndex:
+        """Sorted index on year, buy_price (a Flask car's price) or sell_price."""
+        return self.observer("range:" + field, lambda inventory: RangeIndex(field, inventory))
+
+    def between(self, **ranges: Tuple[Any, Any]) -> List[Car]:
+        """
+        Cars within every given inclusive range, in ID order:
+        between(year=(2018, 2021), buy_price=(None, 15000)). None leaves that end open.
+        """
+        ranges = {field: bounds for field, bounds in ranges.items() if bounds != (None, None)}
+        if not ranges:
+            return [self._by_id[car_id] for car_id in self.sorted_ids()]
+        indexes = {field: self.range_index(field) for field in ranges}
+        # Start from the narrowest range and check the others on its cars
+        field = min(ranges, key=lambda name: indexes[name].count(*ranges[name]))
+        cars = []
+        for car_id in sorted(indexes[field].ids(*ranges[field])):
+            car = self._by_id[car_id]
+            if all(_within(getattr(car, other, None), *bounds)
+                   for other, bounds in ranges.items() if other != field):
+                cars.append(car)
+        return cars
+
+    def freeze(self) -> "Inventory":
+        self._frozen = True
+        return self
+
+    @property
+    def frozen(self) -> bool:
+        return self._frozen
+
+    def drain_changes(self) -> List[Tuple[str, Any]]:
+        """Return the changes made since the last call and forget them."""
+        changes, self._changes = self._changes, []
+        return changes
+
+    def _check_writable(self):
+        if self._frozen:
+            raise TypeError("Inventory snapshot is read-only; change a copy() instead")
+
+    def _record_change(self, op: str, value):
+        self._changes.append((op, value))
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        """The records as plain dicts, each in the schema it was added with."""
+        return [car.to_dict() for car in self._by_id.values()]
@@ -7,12 +7,27 @@ def print_welcome():
 =====================================
     """)
 
+import argparse
+import sys
+from pathlib import Path
+
+# Import storage from project root when it is not next to this file
+try:
+    import storage
+except ImportError:
+    root = Path(__file__).resolve().parent.parent
+    if str(root) not in sys.path:
+        sys.path.insert(0, str(root))
+    import storage
+
 from functions import *
-import storage
+from inventory import Inventory
 
 def main():
     first_login = True
-    inventory = storage.load_inventory()
+    # Resolve where the inventory lives once; every save below reuses it
+    context = storage.get_context()
+    inventory = Inventory(context.load())
     while True:
         if first_login:
             print_welcome()
@@ -25,6 +40,8 @@ def main():
         print("5. Sort Cars")
         print("6. Sell Car")
         print("7. Show Stats")
+        print("8. Search Cars")
+        print("9. Find Cars by Year/Price")
         print("0. Exit")
         choice = input("Enter your choice: ")
 
@@ -42,11 +59,32 @@ def main():
             sell_car(inventory)
         elif choice == "7":
             show_stats(inventory)
+        elif choice == "8":
+            search_cars(inventory)
+        elif choice == "9":
+            find_cars(inventory)
         elif choice == "0":
             print("Goodbye!")
             break
         else:
             print("Invalid choice. Try again.")
 
+def run_command(argv):
+    parser = argparse.ArgumentParser(prog="main.py", description="Car Lot Manager")
+    commands = parser.add_subparsers(dest="command", required=True)
+    import_parser = commands.add_parser("import", help="Add all cars from a CSV or NDJSON file")
+    import_parser.add_argument("path")
+    import_parser.add_argument("--format", choices=["csv", "ndjson"])
+    import_parser.add_argument("--strict", action="store_true",
+                               help="Import nothing if any row is invalid")
+    args = parser.parse_args(argv)
+
+    if args.command == "import":
+        inventory = Inventory(storage.load_inventory())
+        import_cars(inventory, args.path, fmt=args.format, strict=args.strict)
+    return 0
+
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sys.exit(run_command(sys.argv[1:]))
     main()
@@ -0,0 +1,290 @@
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from pathlib import Path
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; fine at the low end so lock waits and cache hits still land in a bucket
+DEFAULT_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Seconds between writes of a worker's metrics to the shared directory
+SHARE_INTERVAL = 1.0
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=""):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _header(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+    def values(self):
+        with self._lock:
+            return {labels: self._copy(value) for labels, value in self._values.items()}
+
+    def state(self):
+        """This process's values in JSON form, for merge() in another process."""
+        return [[list(labels), value] for labels, value in self.values().items()]
+
+    def merge(self, states):
+        """Values of this metric summed over the state() of every process."""
+        merged = {}
+        for state in states:
+            for labels, value in state:
+                labels = tuple(labels)
+                merged[labels] = value if labels not in merged else self._add(merged[labels], value)
+        return merged
+
+    @staticmethod
+    def _copy(value):
+        return value
+
+    @staticmethod
+    def _add(a, b):
+        return a + b
+
+    def render(self, merged):
+        lines = self._header()
+        for label_values, value in sorted(merged[self].items()):
+            lines.append(f"{self.name}{_format_labels(self.labels, label_values)} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, *label_values):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+
+class Gauge(_Metric):
+    """
+    A value that can go up and down. Across worker processes the values are summed,
+    or with merge="last" the answering process's own value is shown (for values
+    every worker sees alike, such as the inventory version).
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name, help, labels=(), merge="sum"):
+        super().__init__(name, help, labels)
+        self.merge_mode = merge
+
+    def merge(self, states):
+        if self.merge_mode == "last":
+            return self.values()
+        return super().merge(states)
+
+    def set(self, value, *label_values):
+        with self._lock:
+            self._values[label_values] = value
+
+
+class Histogram(_Metric):
+    """
+    Observations counted into fixed buckets. observe() is a bisect and three
+    additions under a lock, cheap enough to run on every request.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, *label_values):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(label_values)
+            if state is None:
+                # Per-bucket (not cumulative) counts with a last slot for +Inf, sum
+                state = self._values[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    @staticmethod
+    def _copy(value):
+        return [list(value[0]), value[1]]
+
+    @staticmethod
+    def _add(a, b):
+        return [[x + y for x, y in zip(a[0], b[0])], a[1] + b[1]]
+
+    def render(self, merged):
+        lines = self._header()
+        for label_values, (counts, total) in sorted(merged[self].items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, label_values, le)} {cumulative}")
+            labels = _format_labels(self.labels, label_values)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Ratio(_Metric):
+    """A gauge computed at render time as numerator / (numerator + denominator)."""
+
+    kind = "gauge"
+
+    def __init__(self, name, help, numerator, denominator):
+        super().__init__(name, help, numerator.labels)
+        self.numerator = numerator
+        self.denominator = denominator
+
+    def merge(self, states):
+        return {}
+
+    def render(self, merged):
+        hits, misses = merged[self.numerator], merged[self.denominator]
+        ratios = {}
+        for labels in set(hits) | set(misses):
+            total = hits.get(labels, 0) + misses.get(labels, 0)
+            ratios[labels] = hits.get(labels, 0) / total if total else 0.0
+        return super().render({self: ratios})
+
+
+class Registry:
+    """
+    The metrics of one process, rendered in the Prometheus text format.
+
+    Collectors registered with collector() run before every render, to set gauges
+    read from elsewhere. After share(directory) the registry writes its state to
+    <directory>/<pid>.json every SHARE_INTERVAL seconds and render() adds up the
+    files of every process, so worker processes serving one port report as one:
+    whichever worker answers a scrape, counters never go backwards. Files of exited
+    workers are kept so their counts stay in the totals; a worker's last second of
+    counts can be missing from them.
+    """
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+        self.directory = None
+
+    def _register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help, labels=()):
+        return self._register(Counter(name, help, labels))
+
+    def gauge(self, name, help, labels=(), merge="sum"):
+        return self._register(Gauge(name, help, labels, merge))
+
+    def histogram(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, help, labels, buckets))
+
+    def ratio(self, name, help, numerator, denominator):
+        return self._register(Ratio(name, help, numerator, denominator))
+
+    def collector(self, collect):
+        """Run collect() before every render (and every write of the shared state)."""
+        self._collectors.append(collect)
+        return collect
+
+    def _collect(self):
+        for collect in self._collectors:
+            collect()
+
+    def share(self, directory):
+        """Start writing this process's state to directory and merging every process's on render."""
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        thread = threading.Thread(target=self._share_loop, name="metrics-writer", daemon=True)
+        thread.start()
+
+    def _share_loop(self):
+        while True:
+            try:
+                self._collect()
+                self.dump()
+            except Exception:
+                # A failed write leaves the previous file, a second older; try again
+                pass
+            time.sleep(SHARE_INTERVAL)
+
+    def dump(self):
+        path = self.directory / f"{os.getpid()}.json"
+        tmp = path.with_suffix(".tmp")
+        state = {metric.name: metric.state() for metric in self._metrics}
+        tmp.write_text(json.dumps(state))
+        os.replace(tmp, path)
+
+    def _states(self):
+        states = []
+        for path in self.directory.glob("*.json"):
+            try:
+                states.append(json.loads(path.read_text()))
+            except (OSError, ValueError):
+                continue
+        return states
+
+    def render(self):
+        self._collect()
+        if self.directory is None:
+            merged = {metric: metric.values() for metric in self._metrics}
+        else:
+            self.dump()
+            states = self._states()
+            merged = {metric: metric.merge([state.get(metric.name, []) for state in states])
+                      for metric in self._metrics}
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render(merged))
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+STORAGE_SECONDS = registry.histogram(
+    "carlot_storage_duration_seconds", "Time to read or write the inventory file.", ("operation",))
+STORAGE_BYTES = registry.counter(
+    "carlot_storage_bytes_total", "Bytes of inventory file read or written.", ("operation",))
+STORAGE_FILE_BYTES = registry.gauge(
+    "carlot_storage_file_bytes", "Size of the inventory file at the last read or write.", merge="last")
+LOCK_WAIT_SECONDS = registry.histogram(
+    "carlot_store_lock_wait_seconds", "Time spent waiting for the inventory write lock.")
+
+REQUESTS = registry.counter(
+    "carlot_http_requests_total", "HTTP requests by route, method and status.", ("method", "route", "status"))
+REQUEST_SECONDS = registry.histogram(
+    "carlot_http_request_duration_seconds", "Time to produce the response, by route.", ("method", "route"))
+INVENTORY_CARS = registry.gauge(
+    "carlot_inventory_cars", "Cars in the current inventory snapshot.", merge="last")
+INVENTORY_VERSION = registry.gauge(
+    "carlot_inventory_version", "Version of the current inventory snapshot.", merge="last")
+CACHE_HITS = registry.gauge(
+    "carlot_cache_hits", "Cache hits since start.", ("cache",))
+CACHE_MISSES = registry.gauge(
+    "carlot_cache_misses", "Cache misses since start.", ("cache",))
+CACHE_HIT_RATIO = registry.ratio(
+    "carlot_cache_hit_ratio", "Cache hits / lookups since start.", CACHE_HITS, CACHE_MISSES)
@@ -0,0 +1,101 @@
+import cProfile
+import hmac
+import os
+import pstats
+import re
+import threading
+import time
+from pathlib import Path
+
+MODES = ("off", "header", "all")
+HEADER = "X-Profile"
+
+
+class RequestProfiler:
+    """
+    Runs cProfile around selected requests and writes the stats to directory.
+
+    mode "header" profiles requests whose X-Profile header equals token, which
+    that mode requires: profiling slows the request and writes a file, so it must
+    not be something any client can trigger. "all" profiles every request.
+    routes limits either mode to those route patterns. Stats are summed per route
+    over `aggregate` requests and then written as <route>-<timestamp>.prof,
+    readable with `python -m pstats <file>` or snakeviz.
+
+    Only one request is profiled at a time; requests arriving meanwhile run
+    unprofiled rather than wait.
+    """
+
+    def __init__(self, directory, mode="off", aggregate=1, token=None, routes=None):
+        if mode not in MODES:
+            raise ValueError(f"Unknown profiling mode: {mode}")
+        if mode == "header" and not token:
+            raise ValueError("Profiling mode header needs a token (CARLOT_PROFILE_TOKEN)")
+        self.directory = Path(directory)
+        self.mode = mode
+        self.aggregate = max(1, aggregate)
+        self.token = token
+        self.routes = set(routes) if routes else None
+        self._busy = threading.Lock()
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._dumps = 0
+
+    @classmethod
+    def from_env(cls, directory, environ=os.environ):
+        routes = [r.strip() for r in environ.get('CARLOT_PROFILE_ROUTES', '').split(',') if r.strip()]
+        return cls(directory,
+                   mode=environ.get('CARLOT_PROFILE', 'off').strip().lower() or 'off',
+                   aggregate=int(environ.get('CARLOT_PROFILE_REQUESTS') or 1),
+                   token=environ.get('CARLOT_PROFILE_TOKEN') or None,
+                   routes=routes)
+
+    @property
+    def enabled(self):
+        return self.mode != "off"
+
+    def wanted(self, route, headers):
+        if not self.enabled or (self.routes is not None and route not in self.routes):
+            return False
+        if self.mode == "all":
+            return True
+        value = headers.get(HEADER)
+        return value is not None and hmac.compare_digest(value.encode(), self.token.encode())
+
+    def start(self):
+        """A running profiler, or None when another request is being profiled."""
+        if not self._busy.acquire(blocking=False):
+            return None
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiler (a debugger, say) already owns the hook
+            self._busy.release()
+            return None
+        return profile
+
+    def finish(self, profile, route):
+        """Stop profile and add it to route's stats. Returns the file written, if any."""
+        try:
+            profile.disable()
+        finally:
+            self._busy.release()
+        with self._lock:
+            stats, count = self._pending.get(route, (None, 0))
+            if stats is None:
+                stats = pstats.Stats(profile)
+            else:
+                stats.add(profile)
+            count += 1
+            if count < self.aggregate:
+                self._pending[route] = (stats, count)
+                return None
+            self._pending.pop(route, None)
+            self._dumps += 1
+            sequence = self._dumps
+        self.directory.mkdir(parents=True, exist_ok=True)
+        name = re.sub(r'[^A-Za-z0-9]+', '_', route).strip('_') or 'root'
+        path = self.directory / f"{name}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{sequence}.prof"
+        stats.dump_stats(path)
+        return path
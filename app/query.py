@@ -0,0 +1,130 @@
+from bisect import bisect_right
+
+FIELDS = ("id", "make", "model", "year", "price", "status")
+STATUSES = ("available", "sold")
+MAX_LIMIT = 1000
+# Walk a range index instead of every ID when it holds at most this share of the cars
+INDEX_SHARE = 0.25
+
+
+class QueryError(ValueError):
+    """A query string parameter that cannot be used; reported to the client as 400."""
+
+
+def _int_arg(args, name):
+    value = args.get(name)
+    if value is None or value == '':
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise QueryError(f"{name} must be an integer")
+
+
+class InventoryQuery:
+    """
+    Filters, field projection and cursor pagination for /api/inventory.
+
+    Pages are returned in ID order. The cursor is the ID of the last car on the
+    previous page (after=<id>); it is located by bisecting the snapshot's sorted ID
+    list, so fetching a page costs the page, not the inventory.
+
+    When a year or price range is narrow enough, only the cars inside it (found
+    with the snapshot's range index) are checked instead of walking every ID.
+    """
+
+    def __init__(self, status=None, make=None, min_year=None, max_year=None,
+                 min_price=None, max_price=None, fields=None, limit=None, after=None):
+        self.status = status
+        self.make = make.lower() if make else None
+        self.min_year = min_year
+        self.max_year = max_year
+        self.min_price = min_price
+        self.max_price = max_price
+        self.fields = fields
+        self.limit = limit
+        self.after = after
+
+    @classmethod
+    def from_args(cls, args):
+        status = args.get('status') or None
+        if status is not None and status not in STATUSES:
+            raise QueryError(f"status must be one of: {', '.join(STATUSES)}")
+        fields = None
+        if args.get('fields'):
+            fields = tuple(f.strip() for f in args['fields'].split(',') if f.strip())
+            unknown = [f for f in fields if f not in FIELDS]
+            if unknown:
+                raise QueryError(f"Unknown fields: {', '.join(unknown)}")
+        limit = _int_arg(args, 'limit')
+        if limit is not None and not 1 <= limit <= MAX_LIMIT:
+            raise QueryError(f"limit must be between 1 and {MAX_LIMIT}")
+        return cls(
+            status=status,
+            make=args.get('make') or None,
+            min_year=_int_arg(args, 'min_year'),
+            max_year=_int_arg(args, 'max_year'),
+            min_price=_int_arg(args, 'min_price'),
+            max_price=_int_arg(args, 'max_price'),
+            fields=fields,
+            limit=limit,
+            after=_int_arg(args, 'after'),
+        )
+
+    def matches(self, car):
+        if self.status is not None and car.get('status', 'available') != self.status:
+            return False
+        if self.make is not None and car['make'].lower() != self.make:
+            return False
+        if self.min_year is not None and car['year'] < self.min_year:
+            return False
+        if self.max_year is not None and car['year'] > self.max_year:
+            return False
+        if self.min_price is not None and car['price'] < self.min_price:
+            return False
+        if self.max_price is not None and car['price'] > self.max_price:
+            return False
+        return True
+
+    def project(self, car):
+        if self.fields is None:
+            return car
+        return {field: car[field] for field in self.fields if field in car}
+
+    def _candidate_ids(self, inventory):
+        """Sorted IDs of the cars in the narrowest year/price range, or None to scan all."""
+        best = None
+        for field, lo, hi in (("year", self.min_year, self.max_year),
+                              ("buy_price", self.min_price, self.max_price)):
+            if lo is None and hi is None:
+                continue
+            index = inventory.range_index(field)
+            count = index.count(lo, hi)
+            if best is None or count < best[0]:
+                best = (count, index, lo, hi)
+        if best is None or best[0] > len(inventory) * INDEX_SHARE:
+            return None
+        _, index, lo, hi = best
+        return sorted(index.ids(lo, hi))
+
+    def iter_matches(self, inventory):
+        """Yield the matching cars in ID order, starting after the cursor."""
+        ids = self._candidate_ids(inventory)
+        if ids is None:
+            ids = inventory.sorted_ids()
+        start = 0 if self.after is None else bisect_right(ids, self.after)
+        for i in range(start, len(ids)):
+            car = inventory.get(ids[i])
+            if self.matches(car):
+                yield car
+
+    def run(self, inventory):
+        """Return (page of projected cars, cursor for the next page or None)."""
+        page = []
+        last_id = None
+        for car in self.iter_matches(inventory):
+            if self.limit is not None and len(page) == self.limit:
+                return page, last_id
+            page.append(self.project(car))
+            last_id = car['id']
+        return page, None
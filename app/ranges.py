@@ -0,0 +1,81 @@
+from bisect import bisect_left, bisect_right, insort
+from typing import Dict, List, Optional, Tuple
+
+# Histogram bucket width per indexed field
+BUCKET_WIDTHS = {"year": 1, "buy_price": 5000, "sell_price": 5000}
+_MAX_ID = float("inf")
+
+
+class RangeIndex:
+    """
+    Secondary index on one numeric Car attribute (year, buy_price or sell_price;
+    a Flask record's price is its buy_price).
+
+    (value, id) pairs are kept sorted, so the cars with lo <= value <= hi are found
+    with two bisects, and a histogram of bucket -> count is updated alongside.
+    Cars without a value (an unsold car's sell_price) are left out. An Inventory
+    observer, kept current as cars are added, changed and removed.
+    """
+
+    def __init__(self, field: str, cars=(), bucket_width: Optional[float] = None):
+        self.field = field
+        self.bucket_width = bucket_width or BUCKET_WIDTHS.get(field, 1)
+        self._entries: List[Tuple[float, int]] = []
+        self._buckets: Dict[float, int] = {}
+        entries = []
+        for car in cars:
+            value = getattr(car, self.field, None)
+            if value is not None:
+                entries.append((value, car.id))
+                self._count(value, 1)
+        entries.sort()
+        self._entries = entries
+
+    def _count(self, value, change):
+        bucket = value // self.bucket_width * self.bucket_width
+        count = self._buckets.get(bucket, 0) + change
+        if count:
+            self._buckets[bucket] = count
+        else:
+            self._buckets.pop(bucket, None)
+
+    def added(self, car):
+        value = getattr(car, self.field, None)
+        if value is not None:
+            insort(self._entries, (value, car.id))
+            self._count(value, 1)
+
+    def removed(self, car):
+        value = getattr(car, self.field, None)
+        if value is None:
+            return
+        entry = (value, car.id)
+        index = bisect_left(self._entries, entry)
+        if index < len(self._entries) and self._entries[index] == entry:
+            del self._entries[index]
+            self._count(value, -1)
+
+    def copy(self) -> "RangeIndex":
+        clone = RangeIndex(self.field, bucket_width=self.bucket_width)
+        clone._entries = list(self._entries)
+        clone._buckets = dict(self._buckets)
+        return clone
+
+    def _bounds(self, lo, hi):
+        start = 0 if lo is None else bisect_left(self._entries, (lo,))
+        end = len(self._entries) if hi is None else bisect_right(self._entries, (hi, _MAX_ID))
+        return start, max(start, end)
+
+    def count(self, lo=None, hi=None) -> int:
+        start, end = self._bounds(lo, hi)
+        return end - start
+
+    def ids(self, lo=None, hi=None) -> List[int]:
+        """IDs of the cars with lo <= value <= hi (None = unbounded), ordered by value."""
+        start, end = self._bounds(lo, hi)
+        return [car_id for _, car_id in self._entries[start:end]]
+
+    def histogram(self) -> List[Dict[str, float]]:
+        """[{"from": bucket start, "to": next bucket start, "count": n}, ...] by bucket."""
+        return [{"from": bucket, "to": bucket + self.bucket_width, "count": count}
+                for bucket, count in sorted(self._buckets.items())]
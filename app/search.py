@@ -0,0 +1,151 @@
+import re
+from bisect import bisect_left, insort
+from heapq import merge
+from typing import Dict, List
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+DEFAULT_LIMIT = 20
+
+
+def tokenize(text) -> List[str]:
+    return _TOKEN.findall(str(text).lower())
+
+
+def _within_distance(a: str, b: str, limit: int) -> bool:
+    """Levenshtein distance between a and b is at most limit."""
+    if abs(len(a) - len(b)) > limit:
+        return False
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, start=1):
+        current = [i]
+        for j, char_b in enumerate(b, start=1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        if min(current) > limit:
+            return False
+        previous = current
+    return previous[-1] <= limit
+
+
+def _contains(ids: List[int], car_id: int) -> bool:
+    index = bisect_left(ids, car_id)
+    return index < len(ids) and ids[index] == car_id
+
+
+class SearchIndex:
+    """
+    Inverted index from the words of each car's brand (make) and model to car IDs.
+
+    Each word maps to a sorted list of IDs and the words themselves are kept
+    sorted, so a prefix is found with one bisect and results come out in ID
+    order by merging lists, stopping at the limit instead of collecting every
+    match. Words with no prefix match are matched fuzzily (one typo, two for
+    longer words) against the vocabulary, which is the distinct words only.
+
+    An Inventory observer: kept current on every add, change and removal. Copies
+    share the ID lists and copy one only when they change it, so the inventory's
+    copy-on-write updates stay cheap.
+    """
+
+    def __init__(self, cars=()):
+        self._postings: Dict[str, List[int]] = {}
+        self._vocabulary: List[str] = []
+        self._owned = set()
+        self._owns_vocabulary = True
+        for car in cars:
+            self.added(car)
+
+    @staticmethod
+    def _words(car):
+        return set(tokenize(getattr(car, "brand", "") or "") + tokenize(getattr(car, "model", "") or ""))
+
+    def _writable(self, word):
+        ids = self._postings.get(word)
+        if ids is not None and word not in self._owned:
+            ids = self._postings[word] = list(ids)
+            self._owned.add(word)
+        return ids
+
+    def _writable_vocabulary(self):
+        if not self._owns_vocabulary:
+            self._vocabulary = list(self._vocabulary)
+            self._owns_vocabulary = True
+        return self._vocabulary
+
+    def added(self, car):
+        car_id = car.id
+        for word in self._words(car):
+            ids = self._writable(word)
+            if ids is None:
+                self._postings[word] = [car_id]
+                self._owned.add(word)
+                insort(self._writable_vocabulary(), word)
+            elif not ids or ids[-1] < car_id:
+                ids.append(car_id)
+            else:
+                insort(ids, car_id)
+
+    def removed(self, car):
+        car_id = car.id
+        for word in self._words(car):
+            ids = self._writable(word)
+            if ids is None:
+                continue
+            index = bisect_left(ids, car_id)
+            if index < len(ids) and ids[index] == car_id:
+                del ids[index]
+            if not ids:
+                del self._postings[word]
+                self._owned.discard(word)
+                vocabulary = self._writable_vocabulary()
+                del vocabulary[bisect_left(vocabulary, word)]
+
+    def copy(self) -> "SearchIndex":
+        clone = SearchIndex()
+        clone._postings = dict(self._postings)
+        clone._vocabulary = self._vocabulary
+        clone._owns_vocabulary = False
+        # Both now share every list; whichever changes one first copies it
+        self._owned = set()
+        self._owns_vocabulary = False
+        return clone
+
+    def _matching_words(self, term: str) -> List[str]:
+        vocabulary = self._vocabulary
+        words = []
+        for i in range(bisect_left(vocabulary, term), len(vocabulary)):
+            if not vocabulary[i].startswith(term):
+                break
+            words.append(vocabulary[i])
+        if words:
+            return words
+        limit = 1 if len(term) <= 5 else 2
+        return [word for word in vocabulary if _within_distance(term, word, limit)]
+
+    def search(self, query: str, limit: int = DEFAULT_LIMIT) -> List[int]:
+        """
+        IDs of the cars matching every word of query (as a prefix, or fuzzily),
+        in ascending order, at most limit of them.
+        """
+        terms = tokenize(query)
+        if not terms:
+            return []
+        matches = []
+        for term in dict.fromkeys(terms):
+            words = self._matching_words(term)
+            if not words:
+                return []
+            matches.append([self._postings[word] for word in words])
+        # Walk the term with the fewest IDs and check the others for each of them
+        matches.sort(key=lambda lists: sum(map(len, lists)))
+        first, others = matches[0], matches[1:]
+        results = []
+        previous = None
+        for car_id in merge(*first):
+            if car_id == previous:
+                continue
+            previous = car_id
+            if all(any(_contains(ids, car_id) for ids in lists) for lists in others):
+                results.append(car_id)
+                if len(results) == limit:
+                    break
+        return results
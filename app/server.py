@@ -0,0 +1,201 @@
+import argparse
+import gc
+import os
+import shutil
+import signal
+import socket
+import sys
+import tempfile
+import threading
+import time
+import traceback
+
+from werkzeug.serving import ThreadedWSGIServer
+
+# Seconds to wait before replacing a worker that died right after starting
+RESPAWN_DELAY = 1.0
+# Seconds a stopping server gives the requests in progress to finish; the parent
+# kills workers still running a second after that
+SHUTDOWN_TIMEOUT = 10.0
+
+
+def default_workers(environ=os.environ):
+    return int(environ.get('CARLOT_WORKERS') or 0) or os.cpu_count() or 1
+
+
+class DrainingServer(ThreadedWSGIServer):
+    """
+    Werkzeug's threaded server, counting the connections being served so that a
+    stop can wait for them. Its request threads are daemons, so without drain()
+    exiting the process would cut off every request in progress.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._idle = threading.Condition()
+        self._active = 0
+
+    def process_request_thread(self, request, client_address):
+        with self._idle:
+            self._active += 1
+        try:
+            super().process_request_thread(request, client_address)
+        finally:
+            with self._idle:
+                self._active -= 1
+                self._idle.notify_all()
+
+    def drain(self, timeout):
+        """Wait up to timeout seconds for the connections being served. True if none are left."""
+        with self._idle:
+            return self._idle.wait_for(lambda: self._active == 0, timeout)
+
+
+def serve_until_stopped(server, timeout=SHUTDOWN_TIMEOUT):
+    """
+    Run server until SIGTERM, then stop accepting connections and give the ones
+    in progress up to timeout seconds to finish.
+    """
+    # shutdown() waits for serve_forever() to return, so it cannot run in the
+    # handler, which interrupts serve_forever() on this same thread
+    signal.signal(signal.SIGTERM, lambda signum, frame: threading.Thread(target=server.shutdown, daemon=True).start())
+    server.serve_forever()
+    server.socket.close()
+    server.drain(timeout)
+
+
+class PreforkServer:
+    """
+    Serves a WSGI app from several worker processes sharing one listening socket.
+
+    The parent binds the socket, runs preload() (loading the inventory) and then
+    forks the workers, so every worker starts with the loaded snapshot in memory
+    pages shared copy-on-write with the parent instead of reading the file again.
+    gc.freeze() before forking keeps the collector from touching, and so copying,
+    those pages. Each worker serves requests on threads; the kernel spreads
+    connections between the workers. The parent only replaces workers that exit
+    and, on SIGTERM or SIGINT, stops them all.
+
+    Workers do not talk to each other: a worker that commits a change bumps the
+    version in the store's version file, and the others notice it on their next
+    snapshot() (see store.VersionedStore) and reload. Anything else that keeps state
+    in one process only (write-behind durability) is per worker; post_fork(), run
+    in each worker before it serves, is where to set up sharing such state.
+    """
+
+    def __init__(self, app, host="0.0.0.0", port=5000, workers=None, preload=None, post_fork=None):
+        self.app = app
+        self.host = host
+        self.port = port
+        self.workers = workers or default_workers()
+        self.preload = preload
+        self.post_fork = post_fork
+        self.socket = None
+        self._children = {}
+        self._stopping = False
+
+    def bind(self):
+        family = socket.AF_INET6 if ":" in self.host else socket.AF_INET
+        self.socket = socket.create_server((self.host, self.port), family=family, backlog=1024)
+        self.socket.set_inheritable(True)
+        self.port = self.socket.getsockname()[1]
+        return self.socket
+
+    def run(self):
+        """Serve until SIGTERM or SIGINT. Returns the exit status."""
+        if self.socket is None:
+            self.bind()
+        if self.preload is not None:
+            self.preload()
+        gc.collect()
+        gc.freeze()
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+        for _ in range(self.workers):
+            self._spawn()
+        while self._children:
+            try:
+                pid, _ = os.wait()
+            except ChildProcessError:
+                break
+            started = self._children.pop(pid, None)
+            if self._stopping or started is None:
+                continue
+            if time.monotonic() - started < RESPAWN_DELAY:
+                time.sleep(RESPAWN_DELAY)
+            self._spawn()
+        self.socket.close()
+        return 0
+
+    def _stop(self, signum, frame):
+        if self._stopping:
+            return
+        self._stopping = True
+        for pid in list(self._children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        signal.signal(signal.SIGALRM, self._kill)
+        signal.alarm(int(SHUTDOWN_TIMEOUT) + 1)
+
+    def _kill(self, signum, frame):
+        for pid in list(self._children):
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+
+    def _spawn(self):
+        pid = os.fork()
+        if pid:
+            self._children[pid] = time.monotonic()
+            return pid
+        status = 0
+        try:
+            signal.signal(signal.SIGINT, signal.SIG_IGN)
+            signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+            if self.post_fork is not None:
+                self.post_fork()
+            server = DrainingServer(self.host, self.port, self.app, fd=self.socket.fileno())
+            serve_until_stopped(server)
+        except SystemExit as e:
+            status = e.code if isinstance(e.code, int) else 0
+        except BaseException:
+            traceback.print_exc()
+            status = 1
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(status)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="server.py", description="Car Lot Manager production server")
+    parser.add_argument("--host", default=os.environ.get('CARLOT_HOST', '0.0.0.0'))
+    parser.add_argument("--port", type=int, default=int(os.environ.get('PORT') or 5000))
+    parser.add_argument("--workers", type=int, default=default_workers(),
+                        help="Worker processes (default: CARLOT_WORKERS or the number of cores)")
+    args = parser.parse_args(argv)
+
+    import app as app_module
+    if args.workers == 1 or not hasattr(os, "fork"):
+        # One process (or no fork, on Windows): serve from this one, on threads.
+        # Returning normally on SIGTERM lets pending writes be flushed at exit.
+        app_module.preload()
+        serve_until_stopped(DrainingServer(args.host, args.port, app_module.app))
+        return 0
+    if app_module.DURABILITY != "immediate":
+        parser.error("CARLOT_DURABILITY must be immediate when running several workers")
+    # Every worker writes its metrics here and /metrics adds them all up, so a
+    # scrape shows the same totals whichever worker answers it
+    metrics_dir = tempfile.mkdtemp(prefix="carlot-metrics-")
+    try:
+        return PreforkServer(app_module.app, args.host, args.port, args.workers, app_module.preload,
+                             post_fork=lambda: app_module.metrics.registry.share(metrics_dir)).run()
+    finally:
+        shutil.rmtree(metrics_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,88 @@
+from car import Car
+
+
+def _is_sold(car) -> bool:
+    # CLI/Streamlit records have is_sold, Flask records have status
+    if "is_sold" in car:
+        return bool(car["is_sold"])
+    return car.get("status") == "sold"
+
+
+def _buy_price(car) -> float:
+    price = car.get("buy_price", car.get("price"))
+    return price or 0
+
+
+class InventoryStats:
+    """
+    Running totals for an inventory, updated on every add, change and removal so
+    that reading them never walks the cars.
+
+    Attach one to an Inventory with Inventory.stats(); it is then kept current by the
+    inventory itself. Works for both the CLI records (buy_price, sell_price, is_sold)
+    and the Flask records (price, status).
+    """
+
+    def __init__(self, cars=()):
+        self.total = 0
+        self.sold = 0
+        self.buy_price_sum = 0
+        self.available_value = 0
+        self.profit_sum = 0
+        self.profit_count = 0
+        for car in cars:
+            self.added(car)
+
+    def added(self, car):
+        self._apply(car, 1)
+
+    def removed(self, car):
+        self._apply(car, -1)
+
+    def _apply(self, car, sign):
+        if isinstance(car, Car):
+            # Same fields under the same names for both schemas
+            price = getattr(car, "buy_price", None) or 0
+            sold = getattr(car, "is_sold", False)
+            sell_price = getattr(car, "sell_price", None)
+        else:
+            price = _buy_price(car)
+            sold = _is_sold(car)
+            sell_price = car.get("sell_price")
+        self.total += sign
+        self.buy_price_sum += sign * price
+        if sold:
+            self.sold += sign
+            if sell_price is not None:
+                self.profit_sum += sign * (sell_price - price)
+                self.profit_count += sign
+        else:
+            self.available_value += sign * price
+
+    def copy(self) -> "InventoryStats":
+        clone = InventoryStats()
+        clone.__dict__.update(self.__dict__)
+        return clone
+
+    @property
+    def unsold(self):
+        return self.total - self.sold
+
+    @property
+    def average_buy_price(self):
+        return self.buy_price_sum / self.total if self.total else 0
+
+    @property
+    def average_profit(self):
+        return self.profit_sum / self.profit_count if self.profit_count else 0
+
+    def to_dict(self):
+        return {
+            "total": self.total,
+            "sold": self.sold,
+            "unsold": self.unsold,
+            "available_value": self.available_value,
+            "average_buy_price": round(self.average_buy_price, 2),
+            "total_profit": round(self.profit_sum, 2),
+            "average_profit": round(self.average_profit, 2),
+        }
@@ -0,0 +1,384 @@
+import atexit
+import os
+import random
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+from cache import FileCache
+from metrics import LOCK_WAIT_SECONDS, STORAGE_BYTES, STORAGE_FILE_BYTES, STORAGE_SECONDS
+from inventory import Inventory
+
+
+# Reads of the version file that did not parse before giving up
+VERSION_READ_RETRIES = 5
+
+# An immutable published state of the inventory
+Snapshot = namedtuple('Snapshot', ['version', 'inventory'])
+
+
+class VersionConflict(Exception):
+    """Raised when the inventory changed since the version a commit was based on."""
+
+    def __init__(self, expected, current):
+        super().__init__(f"Inventory is at version {current}, not {expected}")
+        self.expected = expected
+        self.current = current
+
+
+class VersionedStore:
+    """
+    Inventory file shared by several processes, with optimistic concurrency.
+
+    The file's location and encoding come from a storage.StorageContext. Every
+    commit bumps an integer version kept in "<path>.version". A writer reads a
+    snapshot and its version without locking, applies its change to a copy in memory,
+    and only then takes an exclusive flock on "<path>.lock" to check that the version
+    is unchanged, write the file and bump the version. If another writer got there
+    first the commit fails with VersionConflict and update() retries on a fresh
+    snapshot, so no update is lost and the lock is held only for the write itself.
+    A writer that keeps losing falls back to applying its change under the lock.
+
+    Readers never lock. Commits write a temporary file, fsync it and rename it over
+    DATA_FILE, so the file on disk is always a complete inventory; the version file
+    is replaced the same way, so readers never see a half-written number. Every
+    snapshot handed to a request is a frozen Inventory that no writer touches again:
+    writers build the next version on a copy and publish it by swapping a reference.
+
+    The cars changed by each version are appended to a ChangeLog ("<path>.changes")
+    under the same lock, so clients can catch up from a version they already have.
+
+    Only the "json" storage backend fits this scheme of whole-file snapshots (in
+    JSON or the binary format); the journal and sqlite backends are refused.
+    """
+
+    def __init__(self, context, initial_data=(), max_retries=5):
+        if context.backend != "json":
+            raise ValueError(f"Storage backend {context.backend!r} is not supported by the Flask store; "
+                             "it needs CARLOT_STORAGE=json (the default)")
+        self.context = context
+        self.path = str(context.path)
+        self.lock_path = str(context.lock_path)
+        self.version_path = str(context.version_path)
+        self.initial_data = list(initial_data)
+        self.max_retries = max_retries
+        self.cache = FileCache(self._read)
+        self.changes = context.changes
+        self._thread_lock = threading.Lock()
+        self._published = None
+
+    def _read(self, path):
+        start = time.perf_counter()
+        inventory = Inventory(self.context.read_file()).freeze()
+        self._observe_io("load", start, path)
+        return inventory
+
+    def _observe_io(self, operation, start, path):
+        STORAGE_SECONDS.observe(time.perf_counter() - start, operation)
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return
+        STORAGE_BYTES.inc(size, operation)
+        STORAGE_FILE_BYTES.set(size)
+
+    def _read_version(self):
+        for attempt in range(VERSION_READ_RETRIES):
+            try:
+                return self.context.version()
+            except ValueError:
+                # The file is replaced atomically, so this is a damaged or foreign
+                # file rather than a torn write; never take it for version 0
+                time.sleep(0.001 * (attempt + 1))
+        raise ValueError(f"Unreadable inventory version in {self.version_path}")
+
+    @contextmanager
+    def _locked(self):
+        start = time.perf_counter()
+        with self._thread_lock, self.context.lock() as lock_file:
+            LOCK_WAIT_SECONDS.observe(time.perf_counter() - start)
+            yield lock_file
+
+    def snapshot(self):
+        """Return the latest Snapshot(version, inventory). Modify a copy() of it."""
+        # The version is read before the data and commits write the data before the
+        # version, so the data is never older than the version it is paired with.
+        try:
+            version = self._read_version()
+        except ValueError:
+            if self._published is None:
+                raise
+            return self._published
+        if not os.path.exists(self.path):
+            try:
+                # Added one by one so the log holds them as the first version's changes
+                inventory = Inventory()
+                for record in self.initial_data:
+                    inventory.add(record)
+                version = self.commit(version, inventory)
+            except VersionConflict:
+                # Another replica created it first
+                version = self._read_version()
+        try:
+            inventory = self.cache.get(self.path, version)
+        except (ValueError, OSError):
+            # Keep serving the last good snapshot rather than made-up data
+            if self._published is None:
+                raise
+            return self._published
+        published = self._published
+        if published is None or published.version != version or published.inventory is not inventory:
+            published = self._published = Snapshot(version, inventory)
+        return published
+
+    def commit(self, expected_version, inventory, version=None, log=None):
+        """
+        Write inventory if the stored version is still expected_version and return the
+        new version. expected_version=None overwrites unconditionally. version stamps
+        the write with that number instead of the next one. log is the list of
+        (version, changes) to append to the change log once the write is in place;
+        by default the changes made to inventory, under the new version.
+        """
+        # Serialize and write the new file before taking the lock; under the lock we
+        # only compare versions and rename it into place.
+        changes = inventory.drain_changes()
+        tmp = self._write_tmp(inventory)
+        try:
+            with self._locked():
+                current = self._read_version()
+                if expected_version is not None and current != expected_version:
+                    raise VersionConflict(expected_version, current)
+                version = current + 1 if version is None else version
+                return self._publish(version, inventory, tmp, [(version, changes)] if log is None else log)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    def update(self, mutate, expected_version=None):
+        """
+        Apply mutate(inventory) to a copy of the latest snapshot and commit it,
+        retrying on conflicts. With expected_version (from an If-Match header) the
+        change is only applied to that exact version and a mismatch is not retried.
+        Returns (version, result of mutate). When mutate returns None nothing is
+        written.
+        """
+        for attempt in range(self.max_retries):
+            version, current = self.snapshot()
+            if expected_version is not None and version != expected_version:
+                raise VersionConflict(expected_version, version)
+            inventory = current.copy()
+            result = mutate(inventory)
+            if result is None:
+                return version, None
+            try:
+                return self.commit(version, inventory), result
+            except VersionConflict:
+                if expected_version is not None:
+                    raise
+                # Randomized exponential backoff so competing replicas do not retry
+                # in lockstep
+                time.sleep(random.uniform(0, 0.001 * 2 ** attempt))
+        # Still losing the race: apply the change while holding the lock, which is
+        # slower for everyone else but guarantees this writer makes progress.
+        with self._locked():
+            version = self._read_version()
+            inventory = self.cache.get(self.path, version).copy()
+            result = mutate(inventory)
+            if result is None:
+                return version, None
+            changes = inventory.drain_changes()
+            tmp = self._write_tmp(inventory)
+            try:
+                return self._publish(version + 1, inventory, tmp, [(version + 1, changes)]), result
+            finally:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+
+    def _write_tmp(self, inventory):
+        tmp = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        start = time.perf_counter()
+        self.context.write_file(tmp, inventory)
+        self._observe_io("save", start, tmp)
+        inventory.freeze()
+        return tmp
+
+    def _publish(self, version, inventory, tmp, log):
+        """
+        Rename tmp over DATA_FILE, set the version and append log's (version, changes)
+        to the change log. Called with the lock held.
+        """
+        os.replace(tmp, self.path)
+        self.context.write_version(version)
+        for logged_version, changes in log:
+            self.changes.append(logged_version, changes)
+        self.cache.put(self.path, inventory, version)
+        self._published = Snapshot(version, inventory)
+        return version
+
+
+DURABILITY = ("immediate", "group", "interval")
+# Seconds the writer waits to gather more changes into one write
+DEFAULT_INTERVALS = {"group": 0.002, "interval": 1.0}
+RETRY_DELAY = 1.0
+
+
+class WriteBehindStore:
+    """
+    A VersionedStore whose writes are made by a background thread.
+
+    update() applies the change to the in-memory snapshot at once and hands the
+    write to the writer thread, which writes whatever accumulated meanwhile as one
+    file (one fsync) however many changes it holds. Durability:
+
+    - "group": update() returns once the write holding its change is on disk, so
+      a burst of concurrent requests shares a single write. If that write fails,
+      every change not yet on disk is dropped from memory and their update() calls
+      raise, so a client told its change failed can safely retry it.
+    - "interval": update() returns immediately and the writer flushes every
+      interval seconds; a crash can lose up to that much, a clean shutdown cannot.
+
+    close() (also run at exit) writes everything still pending. The in-memory
+    snapshot is authoritative, so this process must be the only writer of the file;
+    run replicas with "immediate" durability, i.e. a plain VersionedStore.
+    """
+
+    def __init__(self, store, durability="group", interval=None):
+        if durability not in DEFAULT_INTERVALS:
+            raise ValueError(f"Unknown write-behind durability: {durability}")
+        self.store = store
+        self.cache = store.cache
+        self.changes = store.changes
+        self.durability = durability
+        self.interval = DEFAULT_INTERVALS[durability] if interval is None else interval
+        self._cond = threading.Condition()
+        self._current = None
+        self._durable = None
+        self._durable_version = None
+        self._unlogged = []
+        self._failures = 0
+        self._error = None
+        self._flush_waiters = 0
+        self._closed = False
+        self.writes = 0
+        self._writer = threading.Thread(target=self._run, name="inventory-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def snapshot(self):
+        with self._cond:
+            if self._current is None:
+                self._current = self._durable = self.store.snapshot()
+                self._durable_version = self._current.version
+            return self._current
+
+    def update(self, mutate, expected_version=None):
+        """Same contract as VersionedStore.update(); see the class for when it returns."""
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Store is closed")
+            version, current = self.snapshot()
+            if expected_version is not None and version != expected_version:
+                raise VersionConflict(expected_version, version)
+            inventory = current.copy()
+            result = mutate(inventory)
+            if result is None:
+                return version, None
+            version += 1
+            # Logged by the write that makes it durable, which may hold several versions
+            self._unlogged.append((version, inventory.drain_changes()))
+            self._current = Snapshot(version, inventory.freeze())
+            self._cond.notify_all()
+            if self.durability == "group":
+                self._wait_durable(version)
+            return version, result
+
+    def flush(self):
+        """Block until every change made so far is on disk."""
+        with self._cond:
+            if self._current is None:
+                return
+            self._flush_waiters += 1
+            self._cond.notify_all()
+            try:
+                self._wait_durable(self._current.version)
+            finally:
+                self._flush_waiters -= 1
+
+    def close(self):
+        """Stop the writer after it has written everything pending."""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._writer.join()
+        atexit.unregister(self.close)
+        # The writer gives up on a failing disk at shutdown; try once more here so
+        # the caller sees the error instead of losing the changes silently
+        with self._cond:
+            if self._pending():
+                self._write(self._current)
+
+    def _pending(self):
+        return self._current is not None and self._current.version != self._durable_version
+
+    def _wait_durable(self, version):
+        failures = self._failures
+        while self._durable_version < version:
+            if self._failures != failures:
+                raise self._error
+            self._cond.wait()
+
+    def _run(self):
+        with self._cond:
+            while True:
+                while not self._pending() and not self._closed:
+                    self._cond.wait()
+                if not self._pending():
+                    return
+                deadline = time.monotonic() + self.interval
+                while not self._closed and not self._flush_waiters:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                try:
+                    self._write(self._current)
+                except Exception as e:
+                    self._error = e
+                    self._failures += 1
+                    if self.durability == "group":
+                        # Every update waiting is about to raise; changes made after
+                        # the failed write began build on it, so they go as well
+                        self._current = self._durable
+                        self._unlogged = []
+                    self._cond.notify_all()
+                    if self._closed:
+                        return
+                    self._cond.wait(RETRY_DELAY)
+
+    def _write(self, snapshot):
+        """Write snapshot to disk. Called with the condition held; released while writing."""
+        log = [entry for entry in self._unlogged if entry[0] <= snapshot.version]
+        self._cond.release()
+        try:
+            self.store.commit(None, snapshot.inventory, snapshot.version, log)
+        finally:
+            self._cond.acquire()
+        self._unlogged = [entry for entry in self._unlogged if entry[0] > snapshot.version]
+        self.writes += 1
+        self._durable = snapshot
+        self._durable_version = snapshot.version
+        self._cond.notify_all()
+
+
+def open_store(context, initial_data=(), durability="immediate", interval=None):
+    """A VersionedStore, wrapped in a WriteBehindStore unless durability is "immediate"."""
+    store = VersionedStore(context, initial_data)
+    if durability == "immediate":
+        return store
+    return WriteBehindStore(store, durability, interval)
@@ -0,0 +1,94 @@
+from bisect import bisect_left, insort
+from functools import total_ordering
+from typing import Any, List, Tuple
+
+SortSpec = Tuple[Tuple[str, bool], ...]
+
+
+def parse_sort_spec(text: str) -> SortSpec:
+    """
+    "brand,-year" -> (("brand", False), ("year", True)): comma separated fields, a
+    leading "-" sorts that field descending.
+    """
+    spec = []
+    for part in text.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        descending = part.startswith("-")
+        field = part.lstrip("+-").strip()
+        if not field:
+            raise ValueError(f"Invalid sort key: {part!r}")
+        spec.append((field, descending))
+    if not spec:
+        raise ValueError("No sort key given")
+    return tuple(spec)
+
+
+@total_ordering
+class _Descending:
+    """Wraps a value so that it sorts in reverse."""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+    def __lt__(self, other):
+        return other.value < self.value
+
+
+class SortedView:
+    """
+    Car IDs ordered by a sort spec, kept in order as the inventory changes.
+
+    The view is an Inventory observer: it is sorted once when first requested and
+    afterwards every added or removed car is placed with a bisect instead of
+    sorting again. Missing or None values (an unsold car's sell_price) sort last
+    whatever the direction, and ties are broken by ID so the order is stable.
+    The inventory itself, and so its storage order, is never touched.
+    """
+
+    def __init__(self, spec: SortSpec, cars=()):
+        self.spec = spec
+        self._entries: List[Tuple[Any, ...]] = sorted(self._entry(car) for car in cars)
+
+    def _entry(self, car) -> Tuple[Any, ...]:
+        # (is None, value) per field, flattened, then the ID: (0, "Ford", 1, None, 7)
+        entry = []
+        for field, descending in self.spec:
+            value = car.get(field)
+            if value is None:
+                entry += (1, None)
+            elif not descending:
+                entry += (0, value)
+            elif isinstance(value, (int, float)):
+                # Negating is much cheaper to compare than the wrapper
+                entry += (0, -value)
+            else:
+                entry += (0, _Descending(value))
+        entry.append(car["id"])
+        return tuple(entry)
+
+    def added(self, car):
+        insort(self._entries, self._entry(car))
+
+    def removed(self, car):
+        entry = self._entry(car)
+        index = bisect_left(self._entries, entry)
+        if index < len(self._entries) and self._entries[index] == entry:
+            del self._entries[index]
+
+    def copy(self) -> "SortedView":
+        clone = SortedView(self.spec)
+        clone._entries = list(self._entries)
+        return clone
+
+    def ids(self) -> List[int]:
+        return [entry[-1] for entry in self._entries]
+
+    def __len__(self) -> int:
+        return len(self._entries)
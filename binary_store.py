@@ -0,0 +1,182 @@
+import json
+import math
+import mmap
+import struct
+import sys
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from car import Car, to_json
+
+MAGIC = b"CLOT"
+FORMAT_VERSION = 1
+SUFFIXES = (".bin",)
+
+# magic, format version, schema, record count, string count
+_HEADER = struct.Struct("<4sHHII")
+_STRING_LENGTH = struct.Struct("<I")
+
+# One fixed-width layout per record schema; brand/make and model are indexes into
+# the string table. A NaN sell_price stands for None.
+_SCHEMAS = {
+    0: (("id", "brand", "model", "year", "buy_price", "sell_price", "is_sold"), struct.Struct("<qIIidd?")),
+    1: (("id", "make", "model", "year", "price", "status"), struct.Struct("<qIIiqB")),
+}
+_STATUSES = ("available", "sold")
+
+
+def _schema_of(car: Dict[str, Any]) -> int:
+    return 0 if "brand" in car else 1
+
+
+class BinaryRecords(Sequence):
+    """
+    Records of a binary snapshot, decoded into Car objects only when accessed.
+
+    The buffer is usually a read-only mmap of the file, so opening a snapshot reads
+    just the header and the string table however many cars it holds.
+    """
+
+    def __init__(self, buffer):
+        magic, version, schema, count, string_count = _HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC or version != FORMAT_VERSION or schema not in _SCHEMAS:
+            raise ValueError("Not a car inventory snapshot")
+        self._buffer = buffer
+        self._fields, self._record = _SCHEMAS[schema]
+        self._flask = schema == 1
+        self._count = count
+        offset = _HEADER.size
+        strings = []
+        for _ in range(string_count):
+            (length,) = _STRING_LENGTH.unpack_from(buffer, offset)
+            offset += _STRING_LENGTH.size
+            strings.append(bytes(buffer[offset:offset + length]).decode("utf-8"))
+            offset += length
+        self._strings = strings
+        self._offset = offset
+        if len(buffer) < offset + count * self._record.size:
+            raise ValueError("Truncated car inventory snapshot")
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._count))]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("record index out of range")
+        return self._decode(self._record.unpack_from(self._buffer, self._offset + index * self._record.size))
+
+    def __iter__(self):
+        end = self._offset + self._count * self._record.size
+        view = memoryview(self._buffer)[self._offset:end]
+        try:
+            for values in self._record.iter_unpack(view):
+                yield self._decode(values)
+        finally:
+            view.release()
+
+    def _decode(self, values) -> Car:
+        strings = self._strings
+        if self._flask:
+            car_id, make, model, year, price, status = values
+            return Car.from_flask(car_id, strings[make], strings[model], year, price, _STATUSES[status])
+        car_id, brand, model, year, buy_price, sell_price, is_sold = values
+        return Car(car_id, strings[brand], strings[model], year, buy_price,
+                   None if math.isnan(sell_price) else sell_price, is_sold)
+
+
+def encode(inventory: Iterable[Dict[str, Any]]) -> bytes:
+    """
+    Binary snapshot of inventory. Every car must have exactly the fields of one of
+    the two record schemas; anything else raises ValueError.
+    """
+    cars = list(inventory)
+    schema = _schema_of(cars[0]) if cars else 0
+    fields, record = _SCHEMAS[schema]
+    string_index: Dict[str, int] = {}
+
+    def intern(value) -> int:
+        if not isinstance(value, str):
+            raise ValueError(f"Expected a string, got {value!r}")
+        return string_index.setdefault(value, len(string_index))
+
+    rows = []
+    for car in cars:
+        if set(car) != set(fields):
+            raise ValueError(f"Car {car.get('id')!r} does not fit the binary format: {sorted(car)}")
+        try:
+            if schema == 1:
+                rows.append(record.pack(car["id"], intern(car["make"]), intern(car["model"]), car["year"],
+                                        car["price"], _STATUSES.index(car["status"])))
+            else:
+                sell_price = car["sell_price"]
+                rows.append(record.pack(car["id"], intern(car["brand"]), intern(car["model"]), car["year"],
+                                        car["buy_price"], math.nan if sell_price is None else sell_price,
+                                        bool(car["is_sold"])))
+        except (struct.error, ValueError) as e:
+            raise ValueError(f"Car {car.get('id')!r} does not fit the binary format: {e}")
+    parts = [_HEADER.pack(MAGIC, FORMAT_VERSION, schema, len(rows), len(string_index))]
+    for value in string_index:
+        data = value.encode("utf-8")
+        parts.append(_STRING_LENGTH.pack(len(data)))
+        parts.append(data)
+    parts.extend(rows)
+    return b"".join(parts)
+
+
+class BinarySerializer:
+    """
+    Fixed-width binary snapshots, an alternative to JsonSerializer for large
+    inventories. load() maps the file into memory and returns BinaryRecords.
+    """
+
+    binary = True
+
+    def dump(self, inventory: Iterable[Dict[str, Any]], fh):
+        fh.write(encode(inventory))
+
+    def load(self, fh) -> BinaryRecords:
+        return BinaryRecords(mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ))
+
+
+def is_binary_path(path) -> bool:
+    return Path(path).suffix in SUFFIXES
+
+
+def convert(source: Path, target: Path) -> int:
+    """Convert between inventory.json and binary snapshots, by file suffix."""
+    source, target = Path(source), Path(target)
+    if is_binary_path(source):
+        with source.open("rb") as fh:
+            cars = list(BinarySerializer().load(fh))
+    else:
+        with source.open("r", encoding="utf-8") as fh:
+            cars = json.load(fh)
+    if is_binary_path(target):
+        target.write_bytes(encode(cars))
+    else:
+        with target.open("w", encoding="utf-8") as fh:
+            json.dump(cars, fh, indent=2, default=to_json)
+    return len(cars)
+
+
+def main(argv: Optional[List[str]] = None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 2:
+        print("Usage: python binary_store.py <source> <target>  (.json <-> .bin)")
+        return 1
+    try:
+        count = convert(Path(argv[0]), Path(argv[1]))
+    except ValueError as e:
+        print(f"Cannot convert: {e}")
+        return 1
+    print(f"Converted {count} cars from {argv[0]} to {argv[1]}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,160 @@
+from collections.abc import Mapping
+from operator import itemgetter
+from typing import Any, Dict, Optional
+
+STATUSES = ("available", "sold")
+
+# (record key, Car attribute) for each JSON schema. A Flask record's status is the
+# is_sold attribute; sell_price is not part of the Flask schema but a set one is
+# carried through a conversion from a CLI record so that nothing is lost, and a
+# CLI record converted from a Flask one gets sell_price None.
+_CLI_KEYS = (("id", "id"), ("brand", "brand"), ("model", "model"), ("year", "year"),
+             ("buy_price", "buy_price"), ("sell_price", "sell_price"), ("is_sold", "is_sold"))
+_FLASK_KEYS = (("id", "id"), ("make", "brand"), ("model", "model"), ("year", "year"),
+               ("price", "buy_price"), ("status", "is_sold"), ("sell_price", "sell_price"))
+_CLI_ATTRS = dict(_CLI_KEYS)
+_FLASK_ATTRS = dict(_FLASK_KEYS)
+_FLASK_HINTS = ("make", "price", "status")
+_CLI_FIELDS = frozenset(_CLI_ATTRS)
+_FLASK_FIELDS = frozenset(key for key, _ in _FLASK_KEYS[:-1])
+_cli_values = itemgetter(*(key for key, _ in _CLI_KEYS))
+_flask_values = itemgetter(*(key for key, _ in _FLASK_KEYS[:-1]))
+
+
+class Car(Mapping):
+    """
+    One car, stored in slots instead of a per-record dict.
+
+    A Car reads like the record it was made from: a CLI/storage record (brand,
+    buy_price, sell_price, is_sold) or a Flask record (make, price, status) keeps
+    its own keys for car["..."], get(), iteration and to_dict(), so code written
+    against dict records works unchanged. The attributes (car.brand,
+    car.buy_price, car.is_sold, ...) are the same for both schemas, and
+    to_dict(schema) converts between them. Keys outside the schema are kept in
+    extra. Cars are never changed in place; replace() returns a new one.
+    """
+
+    __slots__ = ("id", "brand", "model", "year", "buy_price", "sell_price", "is_sold", "flask", "extra")
+
+    def __init__(self, id, brand, model, year, buy_price, sell_price=None, is_sold=False):
+        self.id = id
+        self.brand = brand
+        self.model = model
+        self.year = year
+        self.buy_price = buy_price
+        self.sell_price = sell_price
+        self.is_sold = is_sold
+        self.flask = False
+        self.extra = None
+
+    @classmethod
+    def from_flask(cls, id, make, model, year, price, status) -> "Car":
+        if status not in STATUSES:
+            raise ValueError(f"Unknown status: {status!r}")
+        car = cls.__new__(cls)
+        car.id = id
+        car.brand = make
+        car.model = model
+        car.year = year
+        car.buy_price = price
+        car.is_sold = status == "sold"
+        car.flask = True
+        car.extra = None
+        return car
+
+    @classmethod
+    def from_dict(cls, record) -> "Car":
+        """A Car from a record of either schema; a Car is returned as it is."""
+        if isinstance(record, Car):
+            return record
+        keys = record.keys()
+        # Fast paths for complete records, which is nearly all of them
+        if keys == _CLI_FIELDS:
+            return cls(*_cli_values(record))
+        if keys == _FLASK_FIELDS:
+            return cls.from_flask(*_flask_values(record))
+        flask = "brand" not in record and any(key in record for key in _FLASK_HINTS)
+        attrs = _FLASK_ATTRS if flask else _CLI_ATTRS
+        car = cls.__new__(cls)
+        car.flask = flask
+        car.extra = None
+        for key, value in record.items():
+            attr = attrs.get(key)
+            if attr is None:
+                if car.extra is None:
+                    car.extra = {}
+                car.extra[key] = value
+            elif flask and key == "status":
+                if value not in STATUSES:
+                    raise ValueError(f"Unknown status: {value!r}")
+                car.is_sold = value == "sold"
+            else:
+                setattr(car, attr, value)
+        return car
+
+    def _keys(self, flask: bool):
+        return _FLASK_KEYS if flask else _CLI_KEYS
+
+    def __getitem__(self, key: str):
+        attr = (_FLASK_ATTRS if self.flask else _CLI_ATTRS).get(key)
+        if attr is None:
+            if self.extra is None:
+                raise KeyError(key)
+            return self.extra[key]
+        try:
+            value = getattr(self, attr)
+        except AttributeError:
+            raise KeyError(key) from None
+        if self.flask and key == "status":
+            return "sold" if value else "available"
+        return value
+
+    def __iter__(self):
+        for key, attr in self._keys(self.flask):
+            if hasattr(self, attr):
+                yield key
+        if self.extra:
+            yield from self.extra
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return f"Car({self.to_dict()!r})"
+
+    def to_dict(self, schema: Optional[str] = None) -> Dict[str, Any]:
+        """The record as a dict in its own schema, or in schema ("cli" or "flask")."""
+        flask = self.flask if schema is None else schema == "flask"
+        record = {}
+        for key, attr in self._keys(flask):
+            try:
+                value = getattr(self, attr)
+            except AttributeError:
+                if key != "sell_price" or flask or not self.flask:
+                    continue
+                # A Flask record has no sell price; a CLI record always carries one
+                value = None
+            if flask and key == "sell_price" and value is None:
+                continue
+            if flask and key == "status":
+                value = "sold" if value else "available"
+            record[key] = value
+        if self.extra:
+            record.update(self.extra)
+        return record
+
+    def replace(self, **fields) -> "Car":
+        """A new Car with fields (keys of this car's schema) changed."""
+        return Car.from_dict({**self.to_dict(), **fields})
+
+
+def to_record(obj):
+    """A Car as its dict, anything else as it is; converts before json.dump(s)."""
+    return obj.to_dict() if isinstance(obj, Car) else obj
+
+
+def to_json(obj) -> Dict[str, Any]:
+    """default= hook for json.dump(s) so that Car records serialize as their dict."""
+    if isinstance(obj, Car):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
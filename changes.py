@@ -0,0 +1,168 @@
+import json
+import os
+import threading
+import time
+from bisect import bisect_right
+
+from car import to_json
+
+# The log is rewritten with its newer half once it grows past this many bytes
+DEFAULT_MAX_BYTES = 4 * 1024 * 1024
+# Seconds between looks at the log, and between keep-alive comments on an idle stream
+POLL_INTERVAL = 0.5
+HEARTBEAT_INTERVAL = 15.0
+
+
+class ChangesExpired(Exception):
+    """The changes after a version are no longer (or were never) in the log."""
+
+    def __init__(self, since, oldest):
+        super().__init__(f"Changes since version {since} are not available")
+        self.since = since
+        self.oldest = oldest
+
+
+def encode_changes(changes):
+    """Inventory.drain_changes() output as JSON-ready dicts; None (changes unknown) stays None."""
+    if changes is None:
+        return None
+    return [{"op": "put", "car": value} if op == "put" else {"op": "del", "id": value}
+            for op, value in changes]
+
+
+class ChangeLog:
+    """
+    The changes committed in each inventory version, kept in "<data file>.changes".
+
+    Every commit appends one NDJSON line {"version": n, "changes": [...]}, each change
+    being {"op": "put", "car": {...}} or {"op": "del", "id": n}; a version whose
+    changes are unknown (a save of a plain list) is logged as
+    {"version": n, "reset": true}.
+    Writers append under the store's lock, so every process and replica sharing the
+    data file shares the log. Readers keep the parsed entries in memory and only
+    read what was appended since their last look, so polling costs a stat.
+
+    Once the file passes max_bytes the next append rewrites it with its newer
+    half; asking for changes older than that raises ChangesExpired and the client
+    has to fetch the whole inventory again. So does asking from a version the log
+    went back past: versions only grow, so an entry not newer than the one before
+    it means history was rewritten and those version numbers now name other states.
+    """
+
+    def __init__(self, path, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._inode = None
+        self._offset = 0
+        self._versions = []
+        self._entries = []
+        self._rewound = []
+
+    def append(self, version, changes):
+        """Log the changes (Inventory.drain_changes() output, or None if unknown) made in version."""
+        if changes is None:
+            entry = {"version": version, "reset": True}
+        else:
+            entry = {"version": version, "changes": encode_changes(changes)}
+        line = json.dumps(entry, default=to_json, separators=(",", ":")) + "\n"
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(line)
+            size = f.tell()
+        if size > self.max_bytes:
+            self._compact()
+
+    def _compact(self):
+        with open(self.path, "r", encoding="utf-8") as f:
+            lines = f.readlines()
+        kept, size = [], 0
+        for line in reversed(lines):
+            size += len(line)
+            if size > self.max_bytes // 2 and kept:
+                break
+            kept.append(line)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.writelines(reversed(kept))
+        os.replace(tmp, self.path)
+
+    def _refresh(self):
+        """Read what was appended since the last call. Called with the lock held."""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            self._inode, self._offset, self._versions, self._entries, self._rewound = None, 0, [], [], []
+            return
+        if st.st_ino != self._inode or st.st_size < self._offset:
+            # Compacted (or replaced): start over
+            self._inode, self._offset, self._versions, self._entries, self._rewound = st.st_ino, 0, [], [], []
+        if st.st_size == self._offset:
+            return
+        with open(self.path, "rb") as f:
+            f.seek(self._offset)
+            data = f.read()
+        # A line still being written is left for the next call
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            if line.strip():
+                entry = json.loads(line)
+                if self._versions and entry["version"] <= self._versions[-1]:
+                    # Versions from this one to the last logged are ambiguous; the
+                    # entries before it describe a history that was abandoned
+                    self._rewound.append((entry["version"], self._versions[-1]))
+                    self._versions, self._entries = [], []
+                self._versions.append(entry["version"])
+                self._entries.append(entry)
+        self._offset += end
+
+    def since(self, version):
+        """
+        The entries newer than version, oldest first. Raises ChangesExpired when
+        some of them are missing or a reset among them means the changes are unknown.
+        """
+        with self._lock:
+            self._refresh()
+            versions, entries = self._versions, self._entries
+            if any(low <= version <= high for low, high in self._rewound):
+                raise ChangesExpired(version, versions[0])
+            start = bisect_right(versions, version)
+            if start == len(versions):
+                return []
+            if version < versions[start] - 1:
+                raise ChangesExpired(version, versions[0])
+            newer = entries[start:]
+        if any(entry.get("reset") for entry in newer):
+            raise ChangesExpired(version, versions[0])
+        return newer
+
+
+def reset_event(since):
+    """The SSE event telling a client to fetch the whole inventory again."""
+    return f"event: reset\ndata: {json.dumps({'since': since})}\n\n"
+
+
+def event_stream(log, since, poll_interval=POLL_INTERVAL, heartbeat=HEARTBEAT_INTERVAL):
+    """
+    Yield the entries logged after since as Server-Sent Events ("change", with the
+    version as event ID so a reconnecting client resumes from Last-Event-ID), then
+    keep polling the log for new ones. Ends with a "reset" event when the client
+    has to fetch the whole inventory again.
+    """
+    yield f"retry: {int(poll_interval * 2000)}\n\n"
+    last_sent = time.monotonic()
+    while True:
+        try:
+            entries = log.since(since)
+        except ChangesExpired:
+            yield reset_event(since)
+            return
+        for entry in entries:
+            since = entry["version"]
+            yield f"id: {since}\nevent: change\ndata: {json.dumps(entry, separators=(',', ':'))}\n\n"
+        now = time.monotonic()
+        if entries:
+            last_sent = now
+        elif now - last_sent >= heartbeat:
+            yield ": keepalive\n\n"
+            last_sent = now
+        time.sleep(poll_interval)
@@ -0,0 +1,79 @@
+import json
+import os
+import warnings
+from pathlib import Path
+from typing import Any, Dict, Iterable, Tuple
+
+from car import to_record
+
+_encode = json.JSONEncoder(separators=(",", ":")).encode
+
+
+class Journal:
+    """
+    Append-only log of inventory changes stored next to the JSON snapshot.
+
+    Each line is one compact JSON record, either {"op": "put", "car": {...}} or
+    {"op": "del", "id": N}. Replaying the lines over the snapshot in order gives the
+    current inventory. Both operations are idempotent, so replaying a journal over a
+    snapshot that already contains some of its changes is harmless.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.entries = 0
+
+    def append(self, changes: Iterable[Tuple[str, Any]]):
+        lines = []
+        for op, value in changes:
+            if op == "put":
+                record = {"op": "put", "car": to_record(value)}
+            else:
+                record = {"op": "del", "id": value}
+            lines.append(_encode(record) + "\n")
+        if not lines:
+            return
+        with self.path.open("a", encoding="utf-8") as fh:
+            fh.write("".join(lines))
+            fh.flush()
+            os.fsync(fh.fileno())
+        self.entries += len(lines)
+
+    def replay(self, records: Dict[int, Dict[str, Any]]) -> Dict[int, Dict[str, Any]]:
+        """
+        Apply the journal to records (id -> car, in inventory order) and return them.
+
+        A torn last line left by a crash mid-append is dropped and cut off the file,
+        so later appends do not land behind garbage.
+        """
+        self.entries = 0
+        if not self.path.exists():
+            return records
+        good_bytes = 0
+        with self.path.open("rb") as fh:
+            for raw in fh:
+                try:
+                    if not raw.endswith(b"\n"):
+                        raise ValueError("incomplete line")
+                    entry = json.loads(raw)
+                    if entry["op"] == "put":
+                        car = entry["car"]
+                        records[car["id"]] = car
+                    else:
+                        records.pop(entry["id"], None)
+                except (ValueError, KeyError, TypeError):
+                    warnings.warn(f"Ignoring damaged journal tail in {self.path} after {self.entries} entries")
+                    break
+                good_bytes += len(raw)
+                self.entries += 1
+        if good_bytes < self.path.stat().st_size:
+            with self.path.open("r+b") as fh:
+                fh.truncate(good_bytes)
+        return records
+
+    def clear(self):
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+        self.entries = 0
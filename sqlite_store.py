@@ -0,0 +1,127 @@
+import json
+import sqlite3
+import sys
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+COLUMNS = ("id", "brand", "model", "year", "buy_price", "sell_price", "is_sold")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cars (
+    id INTEGER PRIMARY KEY,
+    seq INTEGER NOT NULL,
+    brand TEXT NOT NULL,
+    model TEXT NOT NULL,
+    year INTEGER NOT NULL,
+    buy_price REAL NOT NULL,
+    sell_price REAL,
+    is_sold INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS cars_seq ON cars (seq);
+CREATE INDEX IF NOT EXISTS cars_brand ON cars (brand);
+CREATE INDEX IF NOT EXISTS cars_year ON cars (year);
+CREATE INDEX IF NOT EXISTS cars_is_sold ON cars (is_sold);
+"""
+
+_UPSERT = """
+INSERT INTO cars (id, seq, brand, model, year, buy_price, sell_price, is_sold)
+VALUES (:id, (SELECT COALESCE(MAX(seq), 0) + 1 FROM cars), :brand, :model, :year, :buy_price, :sell_price, :is_sold)
+ON CONFLICT (id) DO UPDATE SET
+    brand = excluded.brand, model = excluded.model, year = excluded.year,
+    buy_price = excluded.buy_price, sell_price = excluded.sell_price, is_sold = excluded.is_sold
+"""
+
+
+def _row_params(car: Dict[str, Any]) -> Dict[str, Any]:
+    params = {column: car.get(column) for column in COLUMNS}
+    params["is_sold"] = int(bool(params["is_sold"]))
+    return params
+
+
+class SqliteStore:
+    """
+    Inventory kept in a SQLite database in WAL mode.
+
+    Every car is a row, so a change writes one row instead of the whole inventory,
+    and readers in other processes keep reading while a write is in progress. The
+    seq column remembers insertion order, which is the order load() returns.
+
+    Only the CLI and Streamlit app run on it (CARLOT_STORAGE=sqlite). The Flask
+    replicas keep versioned whole-file snapshots (app/store.py) and refuse this
+    backend at startup, so their readers are not helped by WAL mode.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), timeout=5.0, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    @property
+    def initialized(self) -> bool:
+        # user_version is set once the store has been seeded, so deleting every car
+        # later does not bring the import or dummy data back.
+        return self._conn.execute("PRAGMA user_version").fetchone()[0] > 0
+
+    def load(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(COLUMNS)} FROM cars ORDER BY seq").fetchall()
+        cars = []
+        for row in rows:
+            car = dict(zip(COLUMNS, row))
+            car["is_sold"] = bool(car["is_sold"])
+            cars.append(car)
+        return cars
+
+    def apply(self, changes: Iterable[Tuple[str, Any]]):
+        with self._lock, self._conn:
+            for op, value in changes:
+                if op == "put":
+                    self._conn.execute(_UPSERT, _row_params(value))
+                else:
+                    self._conn.execute("DELETE FROM cars WHERE id = ?", (value,))
+
+    def replace_all(self, inventory: Iterable[Dict[str, Any]]):
+        rows = []
+        for seq, car in enumerate(inventory, start=1):
+            params = _row_params(car)
+            params["seq"] = seq
+            rows.append(params)
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM cars")
+            self._conn.executemany(
+                "INSERT INTO cars (id, seq, brand, model, year, buy_price, sell_price, is_sold) "
+                "VALUES (:id, :seq, :brand, :model, :year, :buy_price, :sell_price, :is_sold)",
+                rows)
+            self._conn.execute("PRAGMA user_version = 1")
+
+    def import_json(self, json_path: Path) -> int:
+        """Replace the table contents with the cars in an inventory.json file."""
+        with Path(json_path).open("r", encoding="utf-8") as fh:
+            cars = json.load(fh)
+        self.replace_all(cars)
+        return len(cars)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def main(argv: Optional[List[str]] = None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 2:
+        print("Usage: python sqlite_store.py <inventory.json> <inventory.db>")
+        return 1
+    store = SqliteStore(Path(argv[1]))
+    count = store.import_json(Path(argv[0]))
+    store.close()
+    print(f"Imported {count} cars into {argv[1]}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,29 @@
 import json
 import os
+import threading
 import warnings
+from contextlib import contextmanager
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import Any, Dict, Iterable, List
+
+from binary_store import BinarySerializer, is_binary_path
+from car import to_record
+from changes import ChangeLog
+from journal import Journal
+from sqlite_store import SqliteStore
+
+try:
+    import fcntl
+except ImportError:  # Windows: only threads of this process are serialized
+    fcntl = None
+
+# Backend chosen by resolve_context(): "json" rewrites inventory.json on every save;
+# "journal" appends each change to inventory.journal and only rewrites the snapshot
+# every JOURNAL_COMPACT_ENV changes; "sqlite" keeps one row per car in inventory.db.
+# The Flask app supports "json" only (see store.VersionedStore).
+STORAGE_BACKEND_ENV = "CARLOT_STORAGE"
+JOURNAL_COMPACT_ENV = "CARLOT_JOURNAL_COMPACT_EVERY"
+DEFAULT_JOURNAL_COMPACT_EVERY = 500
 
 
 def _data_file() -> Path:
@@ -53,35 +74,261 @@ def _initial_dummy_data() -> List[Dict[str, Any]]:
     ]
 
 
-def load_inventory() -> List[Dict[str, Any]]:
-    f = _data_file()
-    if not f.exists():
-        data = _initial_dummy_data()
+def _renumber_duplicates(records: Iterable[Dict[str, Any]]):
+    """
+    Every car, with each one whose ID an earlier car already has moved to the end
+    under a fresh ID, as Inventory does on load. Returns (cars, whether any moved).
+    """
+    cars, duplicates, seen = [], [], set()
+    for car in records:
+        (duplicates if car["id"] in seen else cars).append(car)
+        seen.add(car["id"])
+    next_id = max((car_id for car_id in seen if isinstance(car_id, int)), default=0) + 1
+    for car in duplicates:
+        warnings.warn(f"Car ID {car['id']} appears more than once; loading the later car as ID {next_id}")
+        cars.append({**car, "id": next_id})
+        next_id += 1
+    return cars, bool(duplicates)
+
+
+def _compact_every() -> int:
+    try:
+        return max(1, int(os.getenv(JOURNAL_COMPACT_ENV, DEFAULT_JOURNAL_COMPACT_EVERY)))
+    except ValueError:
+        return DEFAULT_JOURNAL_COMPACT_EVERY
+
+
+class JsonSerializer:
+    """How inventory snapshots are encoded on disk."""
+
+    binary = False
+
+    def __init__(self, indent: int = 2):
+        self.indent = indent
+
+    def dump(self, inventory: Iterable[Dict[str, Any]], fh):
+        # Plain dicts and one write: a default= hook per car, or json.dump's many
+        # small writes, make saving markedly slower
+        fh.write(json.dumps([to_record(car) for car in inventory], indent=self.indent))
+
+    def load(self, fh) -> List[Dict[str, Any]]:
+        return json.load(fh)
+
+
+def serializer_for(path, indent: int = 2):
+    """BinarySerializer for .bin data files, JsonSerializer(indent) otherwise."""
+    return BinarySerializer() if is_binary_path(path) else JsonSerializer(indent)
+
+
+class StorageContext:
+    """
+    Where and how the inventory is stored: the data file, the backend ("json",
+    "journal" or "sqlite") and the serializer for snapshots.
+
+    A context is resolved once per process (see get_context()) and reused for every
+    load and save, so the data file location is not probed again each time.
+
+    Every save bumps the version in "<path>.version" and appends what changed to
+    the ChangeLog in "<path>.changes", under an flock on "<path>.lock": the same
+    files the Flask store (store.VersionedStore) versions its commits with, so the
+    CLI, Streamlit and Flask writers of one data file share one change feed.
+    """
+
+    def __init__(self, path: Path, backend: str = "json", serializer: JsonSerializer = None):
+        self.path = Path(path)
+        self.backend = backend
+        self.serializer = serializer or JsonSerializer()
+        self.journal = Journal(self.path.with_name(self.path.stem + ".journal"))
+        self.lock_path = Path(str(self.path) + ".lock")
+        self.version_path = Path(str(self.path) + ".version")
+        self.changes = ChangeLog(str(self.path) + ".changes")
+        self._sqlite = None
+
+    def __repr__(self) -> str:
+        return f"StorageContext(path={str(self.path)!r}, backend={self.backend!r})"
+
+    @property
+    def sqlite(self) -> SqliteStore:
+        if self._sqlite is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._sqlite = SqliteStore(self.path.with_suffix(".db"))
+        return self._sqlite
+
+    def version(self) -> int:
+        """The version of the last save, 0 before the first. ValueError if unreadable."""
         try:
-            save_inventory(data)
-        except Exception:
-            # If we cannot write the file (permission, read-only FS), return the data anyway
+            return int(self.version_path.read_text().strip())
+        except FileNotFoundError:
             pass
+        # Stores written before the version file kept the version in the lock file
+        try:
+            return int(self.lock_path.read_text().strip() or 0)
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def write_version(self, version: int):
+        # Renamed into place, so a reader never sees a half-written number
+        tmp = self.version_path.with_name(f"{self.version_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with tmp.open("w") as fh:
+            fh.write(str(version))
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp, self.version_path)
+
+    @contextmanager
+    def lock(self):
+        """Hold the flock every versioned writer of this data file takes."""
+        with self.lock_path.open("a+") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                lock_file.seek(0)
+                yield lock_file
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _log(self, changes):
+        with self.lock():
+            version = self.version() + 1
+            self.write_version(version)
+            self.changes.append(version, changes)
+        return version
+
+    def load(self) -> List[Dict[str, Any]]:
+        if self.backend == "sqlite":
+            return self._load_sqlite()
+        return self._load_json()
+
+    def _load_sqlite(self) -> List[Dict[str, Any]]:
+        store = self.sqlite
+        if not store.initialized:
+            # One-shot import of the existing JSON inventory (journal included)
+            if self.path.exists() or self.journal.path.exists():
+                store.replace_all(self._load_json())
+            else:
+                store.replace_all(_initial_dummy_data())
+        return store.load()
+
+    def _load_json(self) -> List[Dict[str, Any]]:
+        f = self.path
+        if not f.exists() and not self.journal.path.exists():
+            data = _initial_dummy_data()
+            try:
+                self.save(data)
+            except Exception:
+                # If we cannot write the file (permission, read-only FS), return the data anyway
+                pass
+            return data
+        try:
+            cars, repaired = _renumber_duplicates(self.read_file() if f.exists() else [])
+        except Exception:
+            # If file is corrupted, overwrite with initial data
+            data = _initial_dummy_data()
+            try:
+                self.save(data)
+            except Exception:
+                pass
+            return data
+        if not self.journal.path.exists() and not repaired:
+            return cars
+        # Only the journal replay needs the cars by ID, and the IDs are unique now
+        data = list(self.journal.replay({car["id"]: car for car in cars}).values())
+        if self.backend == "json" or repaired:
+            # Left over from journal mode, or renumbered: write it into the snapshot
+            try:
+                self.save(data)
+            except Exception:
+                pass
         return data
-    try:
-        with f.open("r", encoding="utf-8") as fh:
-            return json.load(fh)
-    except Exception:
-        # If file is corrupted, overwrite with initial data
-        data = _initial_dummy_data()
+
+    def save(self, inventory: Iterable[Dict[str, Any]]) -> int:
+        """Store inventory and return the new version (see the class)."""
+        # ensure parent directory exists
         try:
-            save_inventory(data)
+            self.path.parent.mkdir(parents=True, exist_ok=True)
         except Exception:
             pass
-        return data
+        # Inventory objects remember what changed since they were last saved
+        drain = getattr(inventory, "drain_changes", None)
+        changes = drain() if drain else None
+        self._write(inventory, changes)
+        # A plain list carries no changes: logged as a reset, clients refetch
+        return self._log(changes)
 
+    def _write(self, inventory: Iterable[Dict[str, Any]], changes):
+        if self.backend == "sqlite":
+            store = self.sqlite
+            if changes is not None and store.initialized:
+                store.apply(changes)
+            else:
+                store.replace_all(inventory)
+            return
+        if self.backend == "journal" and changes is not None and self.path.exists():
+            if self.journal.entries + len(changes) < _compact_every():
+                self.journal.append(changes)
+                return
+        # Full snapshot: the default mode, or compaction of a journal that got long
+        self.write_snapshot(inventory)
+        self.journal.clear()
 
-def save_inventory(inventory: List[Dict[str, Any]]):
-    f = _data_file()
-    # ensure parent directory exists
-    try:
-        f.parent.mkdir(parents=True, exist_ok=True)
-    except Exception:
-        pass
-    with f.open("w", encoding="utf-8") as fh:
-        json.dump(inventory, fh, indent=2)
+    def write_snapshot(self, inventory: Iterable[Dict[str, Any]], tmp: Path = None):
+        """
+        Write to a temporary file and rename it over the data file, so a crash
+        mid-write leaves the previous snapshot intact instead of a truncated file.
+        """
+        tmp = tmp or self.path.with_name(self.path.name + ".tmp")
+        self.write_file(tmp, inventory)
+        os.replace(tmp, self.path)
+
+    def _open(self, path: Path, mode: str):
+        if self.serializer.binary:
+            return Path(path).open(mode + "b")
+        return Path(path).open(mode, encoding="utf-8")
+
+    def write_file(self, path: Path, inventory: Iterable[Dict[str, Any]]):
+        with self._open(path, "w") as fh:
+            self.serializer.dump(inventory, fh)
+            fh.flush()
+            os.fsync(fh.fileno())
+
+    def read_file(self) -> List[Dict[str, Any]]:
+        with self._open(self.path, "r") as fh:
+            return self.serializer.load(fh)
+
+
+def resolve_context(path=None, backend: str = None, serializer: JsonSerializer = None) -> StorageContext:
+    """
+    Build a StorageContext. Without a path the data file is located with
+    _data_file(); without a backend the CARLOT_STORAGE environment variable decides;
+    without a serializer the file suffix does (.bin is the binary format).
+    """
+    if backend is None:
+        backend = os.getenv(STORAGE_BACKEND_ENV, "json").strip().lower()
+    path = Path(path) if path is not None else _data_file()
+    return StorageContext(path, backend, serializer or serializer_for(path))
+
+
+_context = None
+
+
+def get_context() -> StorageContext:
+    """The process-wide storage context, resolved on first use."""
+    global _context
+    if _context is None:
+        _context = resolve_context()
+    return _context
+
+
+def set_context(context):
+    """Use context for this process (None resolves it again on next use)."""
+    global _context
+    _context = context
+
+
+def load_inventory() -> List[Dict[str, Any]]:
+    return get_context().load()
+
+
+def save_inventory(inventory: Iterable[Dict[str, Any]]) -> int:
+    return get_context().save(inventory)
@@ -0,0 +1,48 @@
+import unittest
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'app')))
+
+import analytics
+from analytics import InventoryColumns
+
+
+@unittest.skipUnless(analytics.available(), "numpy is not installed")
+class TestInventoryColumns(unittest.TestCase):
+
+    def setUp(self):
+        self.cars = [
+            {"id": 1, "brand": "Toyota", "model": "Corolla", "year": 2018, "buy_price": 10000.0, "sell_price": 12000.0, "is_sold": True},
+            {"id": 2, "brand": "Toyota", "model": "Yaris", "year": 2020, "buy_price": 8000.0, "sell_price": 8500.0, "is_sold": True},
+            {"id": 3, "brand": "Ford", "model": "Focus", "year": 2018, "buy_price": 9000.0, "sell_price": 8000.0, "is_sold": True},
+            {"id": 4, "brand": "Ford", "model": "Fiesta", "year": 2020, "buy_price": 7000.0, "sell_price": None, "is_sold": False},
+        ]
+
+    def test_profit_percentiles(self):
+        columns = InventoryColumns.from_records(self.cars)
+        self.assertEqual(sorted(columns.profit().tolist()), [-1000.0, 500.0, 2000.0])
+        self.assertEqual(columns.profit_percentiles((50,)), {50: 500.0})
+
+    def test_margin_by_brand_and_year(self):
+        columns = InventoryColumns.from_records(self.cars)
+        by_brand = {row["group"]: row for row in columns.margin_by_brand()}
+        self.assertEqual(by_brand["Toyota"]["sold"], 2)
+        self.assertEqual(by_brand["Toyota"]["total_profit"], 2500.0)
+        self.assertEqual(by_brand["Toyota"]["margin"], round(2500 / 20500, 4))
+        self.assertEqual(by_brand["Ford"]["total_profit"], -1000.0)
+        by_year = {row["group"]: row for row in columns.margin_by_year()}
+        self.assertEqual(by_year[2018]["total_profit"], 1000.0)
+        self.assertEqual(by_year[2020]["sold"], 1)
+
+    def test_flask_records_and_empty_inventory(self):
+        flask_cars = [{"id": 1, "make": "Kia", "model": "Rio", "year": 2019, "price": 9000, "status": "sold"}]
+        report = InventoryColumns.from_records(flask_cars).report()
+        self.assertEqual(report["cars"], 1)
+        # Flask records have no sell price, so there is no profit to report
+        self.assertEqual(report["margin_by_brand"], [])
+        self.assertEqual(InventoryColumns.from_records([]).report()["profit_percentiles"], {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,215 @@
+import unittest
+import io
+import json
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'app')))
+
+import app as app_module
+import pstats
+from profiling import RequestProfiler
+from storage import StorageContext
+from store import VersionedStore
+
+
+class TestFlaskApp(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.data_file = os.path.join(self.tmp.name, 'data', 'inventory.json')
+        self._store = app_module.store
+        app_module.store = VersionedStore(StorageContext(self.data_file), app_module.INITIAL_DATA)
+        self.client = app_module.app.test_client()
+
+    def tearDown(self):
+        app_module.store = self._store
+        self.tmp.cleanup()
+
+    def _add(self, **headers):
+        return self.client.post('/add', data={"make": "Kia", "model": "Rio", "year": "2020", "price": "100"},
+                                headers=headers)
+
+    def test_add_allocates_next_id(self):
+        self.assertEqual(self._add().status_code, 302)
+        cars = self.client.get('/api/inventory').get_json()
+        self.assertEqual(cars[-1]["id"], 6)
+        self.assertEqual(cars[-1]["make"], "Kia")
+
+    def test_dashboard_fragments_are_reused_until_a_change(self):
+        self.client.get('/')
+        hits = app_module.page_fragments.hits
+        self.client.get('/')
+        self.assertEqual(app_module.page_fragments.hits, hits + 1)
+        self.client.post('/sell/2')
+        page = self.client.get('/').get_data(as_text=True)
+        self.assertEqual(app_module.page_fragments.hits, hits + 1)
+        self.assertIn('status-sold', page)
+
+    def test_metrics_endpoint(self):
+        self._add()
+        self.client.post('/sell/1')
+        text = self.client.get('/metrics').get_data(as_text=True)
+        self.assertIn('carlot_http_requests_total{method="POST",route="/sell/<int:car_id>",status="302"}', text)
+        self.assertIn('carlot_http_requests_total{method="POST",route="/add",status="302"}', text)
+        self.assertIn('carlot_http_request_duration_seconds_count{method="POST",route="/add"}', text)
+        self.assertIn('carlot_storage_duration_seconds_count{operation="save"}', text)
+        self.assertIn('carlot_store_lock_wait_seconds_count', text)
+        self.assertIn('carlot_inventory_cars 6', text)
+        self.assertIn('carlot_cache_hit_ratio{cache="file"}', text)
+
+    def test_profiling_aggregates_requests(self):
+        profile_dir = os.path.join(self.tmp.name, 'profiles')
+        saved = app_module.profiler
+        app_module.profiler = RequestProfiler(profile_dir, mode="header", aggregate=2, token="secret")
+        self.addCleanup(setattr, app_module, 'profiler', saved)
+        self.assertNotIn('X-Profile-File', self.client.get('/', headers={"X-Profile": "wrong"}).headers)
+        self.assertNotIn('X-Profile-File', self.client.get('/', headers={"X-Profile": "secret"}).headers)
+        name = self.client.get('/', headers={"X-Profile": "secret"}).headers['X-Profile-File']
+        stats = pstats.Stats(os.path.join(profile_dir, name))
+        self.assertTrue(any(func[2] == 'index' for func in stats.stats))
+
+    def test_header_profiling_requires_a_token(self):
+        with self.assertRaises(ValueError):
+            RequestProfiler.from_env(self.tmp.name, {"CARLOT_PROFILE": "header"})
+        self.assertTrue(RequestProfiler.from_env(self.tmp.name, {"CARLOT_PROFILE": "all"}).enabled)
+
+    def test_search_endpoint(self):
+        self._add()
+        response = self.client.get('/api/search?q=ki')
+        self.assertEqual([car["make"] for car in response.get_json()], ["Kia"])
+        self.assertEqual(self.client.get('/api/search?q=toyta').get_json()[0]["id"], 1)
+        self.assertEqual(self.client.get('/api/search').status_code, 400)
+        self.assertEqual(self.client.get('/api/search?q=a&limit=0').status_code, 400)
+
+    def test_stats_endpoint(self):
+        self.client.post('/sell/5')
+        stats = self.client.get('/api/stats').get_json()
+        self.assertEqual((stats["total"], stats["sold"], stats["unsold"]), (5, 1, 4))
+        self.assertEqual(stats["available_value"], 24090 + 22080 + 35000 + 42020)
+
+    def test_bulk_import_commits_valid_rows(self):
+        body = ('{"make": "Kia", "model": "Rio", "year": 2020, "price": 9000}\n'
+                '{"make": "Kia", "model": "Ceed", "year": "new", "price": 9000}\n'
+                '{"id": 3, "make": "Ford", "model": "Ka", "year": 2001, "price": 500}\n'
+                '{"id": 40, "make": "Fiat", "model": "Uno", "year": 1999, "price": 700}\n')
+        response = self.client.post('/api/cars/import?format=ndjson', data=body)
+        result = response.get_json()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(result["added"], 2)
+        self.assertEqual([e["line"] for e in result["errors"]], [2, 3])
+        ids = [car["id"] for car in self.client.get('/api/inventory').get_json()]
+        self.assertEqual(ids, [1, 2, 3, 4, 5, 41, 40])
+
+    def test_bulk_import_csv_upload_strict(self):
+        data = {"file": (io.BytesIO(b"make,model,year,price\nKia,Rio,2020,-5\nKia,Ceed,2021,100\n"), "cars.csv")}
+        response = self.client.post('/api/cars/import?strict=1', data=data,
+                                    content_type='multipart/form-data')
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(len(self.client.get('/api/inventory').get_json()), 5)
+
+    def test_inventory_etag_tracks_version(self):
+        etag = self.client.get('/api/inventory').headers['ETag']
+        response = self.client.post('/sell/1', headers={"If-Match": etag})
+        self.assertEqual(response.status_code, 302)
+        self.assertNotEqual(response.headers['ETag'], etag)
+
+    def test_stale_if_match_is_rejected(self):
+        etag = self.client.get('/api/inventory').headers['ETag']
+        self._add()
+        response = self.client.post('/remove/1', headers={"If-Match": etag})
+        self.assertEqual(response.status_code, 412)
+        ids = [car["id"] for car in self.client.get('/api/inventory').get_json()]
+        self.assertIn(1, ids)
+
+    def test_inventory_pages_follow_next_link(self):
+        ids = []
+        url = '/api/inventory?limit=2&fields=id,price'
+        while url:
+            response = self.client.get(url)
+            page = response.get_json()
+            self.assertLessEqual(len(page), 2)
+            self.assertEqual(set(page[0]), {"id", "price"})
+            ids.extend(car["id"] for car in page)
+            link = response.headers.get('Link')
+            url = link[1:link.index('>')] if link else None
+        self.assertEqual(ids, [1, 2, 3, 4, 5])
+
+    def test_inventory_filters(self):
+        self.client.post('/sell/3')
+        cars = self.client.get('/api/inventory?status=available&min_year=2022&max_price=50000').get_json()
+        self.assertEqual([car["id"] for car in cars], [4])
+        cars = self.client.get('/api/inventory?make=honda').get_json()
+        self.assertEqual([car["id"] for car in cars], [2])
+
+    def test_stats_histograms(self):
+        histograms = self.client.get('/api/stats/histograms').get_json()
+        self.assertEqual([(b["from"], b["count"]) for b in histograms["year"]],
+                         [(2020, 1), (2021, 1), (2022, 2), (2023, 1)])
+        self.assertEqual(sum(b["count"] for b in histograms["price"]), 5)
+        self.assertEqual(histograms["price"][0], {"from": 20000, "to": 25000, "count": 2})
+
+    def test_batch_applies_all_operations_in_one_commit(self):
+        version = self.client.get('/api/stats').headers['ETag']
+        response = self.client.post('/api/cars/batch', json=[
+            {"op": "add", "car": {"make": "Kia", "model": "Rio", "year": 2020, "price": 9000}},
+            {"op": "sell", "id": 6},
+            {"op": "remove", "id": 1},
+        ])
+        self.assertEqual(response.status_code, 200)
+        body = response.get_json()
+        self.assertEqual([r["id"] for r in body["results"]], [6, 6, 1])
+        self.assertEqual(body["version"], int(version.strip('"')) + 1)
+        cars = {car["id"]: car for car in self.client.get('/api/inventory').get_json()}
+        self.assertEqual(cars[6]["status"], "sold")
+        self.assertNotIn(1, cars)
+
+    def test_batch_is_all_or_nothing(self):
+        before = self.client.get('/api/inventory').get_json()
+        response = self.client.post('/api/cars/batch', json={"operations": [
+            {"op": "sell", "id": 2},
+            {"op": "remove", "id": 99},
+            {"op": "add", "car": {"make": "K1a", "model": "Rio", "year": 2020, "price": 1}},
+        ]})
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual([e["index"] for e in response.get_json()["errors"]], [2])
+        response = self.client.post('/api/cars/batch', json=[{"op": "sell", "id": 2}, {"op": "remove", "id": 99}])
+        self.assertEqual(response.get_json()["errors"], [{"index": 1, "error": "Car 99 not found"}])
+        self.assertEqual(self.client.get('/api/inventory').get_json(), before)
+        self.assertEqual(self.client.post('/api/cars/batch', data='nope').status_code, 400)
+
+    def test_changes_since_version(self):
+        version = int(self.client.get('/api/inventory').headers['ETag'].strip('"'))
+        self.client.post('/sell/2')
+        self.client.post('/remove/3')
+        body = self.client.get(f'/api/changes?since={version}').get_json()
+        self.assertEqual(body["version"], version + 2)
+        self.assertEqual([entry["changes"][0]["op"] for entry in body["changes"]], ["put", "del"])
+        self.assertEqual(self.client.get(f'/api/changes?since={version + 2}').get_json()["changes"], [])
+        self.assertEqual(self.client.get('/api/changes?since=-5').status_code, 410)
+        self.assertEqual(self.client.get(f'/api/changes?since={version + 3}').status_code, 410)
+        self.assertEqual(self.client.get('/api/changes').status_code, 400)
+        response = self.client.get(f'/api/changes/stream?since={version}')
+        self.assertEqual(response.mimetype, 'text/event-stream')
+        events = iter(response.response)
+        next(events)
+        self.assertTrue(next(events).startswith(f'id: {version + 1}\nevent: change'.encode()))
+        response.close()
+
+    def test_inventory_rejects_bad_query(self):
+        self.assertEqual(self.client.get('/api/inventory?fields=vin').status_code, 400)
+        self.assertEqual(self.client.get('/api/inventory?limit=abc').status_code, 400)
+
+    def test_export_streams_ndjson_and_json(self):
+        response = self.client.get('/api/inventory/export?fields=id,make')
+        self.assertTrue(response.is_streamed)
+        lines = response.get_data(as_text=True).splitlines()
+        self.assertEqual([json.loads(line)["id"] for line in lines], [1, 2, 3, 4, 5])
+        cars = json.loads(self.client.get('/api/inventory/export?format=json&status=available').get_data())
+        self.assertEqual(len(cars), 5)
+        self.assertEqual(self.client.get('/api/inventory/export?format=xml').status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+import unittest
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'tools')))
+
+import benchmark
+import storage
+
+
+class TestBenchmark(unittest.TestCase):
+
+    def test_generated_cars_are_valid_records(self):
+        cars = benchmark.generate_cars(100)
+        self.assertEqual([car["id"] for car in cars], list(range(1, 101)))
+        self.assertTrue(all(car["is_sold"] == (car["sell_price"] is not None) for car in cars))
+        flask_cars = benchmark.generate_cars(10, schema="flask")
+        self.assertEqual(set(flask_cars[0]), {"id", "make", "model", "year", "price", "status"})
+        self.assertEqual(benchmark.generate_cars(10, seed=1), benchmark.generate_cars(10, seed=1))
+
+    def test_small_run_and_baseline_comparison(self):
+        context = storage.get_context()
+        data_file = os.environ.get("DATA_FILE")
+        report = benchmark.run_suite(sizes=(50,), iterations=3)
+        self.assertIs(storage.get_context(), context)
+        self.assertEqual(os.environ.get("DATA_FILE"), data_file)
+        names = {result["name"] for result in report["results"]}
+        self.assertIn("storage.load_inventory", names)
+        self.assertIn("functions.sort_cars", names)
+        self.assertIn("POST /sell/<id>", names)
+        baseline = {"results": [dict(result, p50_ms=result["p50_ms"] / 10) for result in report["results"]]}
+        rows = benchmark.compare(report, baseline, threshold=0.25)
+        self.assertEqual(len(rows), len(report["results"]))
+        self.assertTrue(all(row[-1] for row in rows))
+
+    def test_more_iterations_than_cars(self):
+        report = benchmark.run_suite(sizes=(5,), iterations=12, suites=("functions", "routes"))
+        self.assertTrue(all(result["iterations"] == 12 for result in report["results"]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+import json
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'app')))
+
+from cache import FileCache
+
+
+class TestFileCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'inventory.json')
+        self.loads = 0
+        self.cache = FileCache(self._load)
+        self._write([{"id": 1}])
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _load(self, path):
+        self.loads += 1
+        with open(path) as f:
+            return json.load(f)
+
+    def _write(self, data):
+        with open(self.path, 'w') as f:
+            json.dump(data, f)
+
+    def test_repeat_reads_are_hits(self):
+        self.cache.get(self.path)
+        self.cache.get(self.path)
+        self.assertEqual(self.loads, 1)
+        self.assertEqual(self.cache.stats()["hits"], 1)
+        self.assertEqual(self.cache.stats()["misses"], 1)
+
+    def test_external_write_is_seen(self):
+        self.cache.get(self.path)
+        self._write([{"id": 1}, {"id": 2}])
+        self.assertEqual(len(self.cache.get(self.path)), 2)
+        self.assertEqual(self.loads, 2)
+
+    def test_put_primes_cache(self):
+        self._write([{"id": 7}])
+        self.cache.put(self.path, [{"id": 7}])
+        self.assertEqual(self.cache.get(self.path), [{"id": 7}])
+        self.assertEqual(self.loads, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
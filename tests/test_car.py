@@ -0,0 +1,58 @@
+import unittest
+import json
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'app')))
+
+from car import Car, to_json
+
+
+class TestCar(unittest.TestCase):
+
+    def setUp(self):
+        self.cli = {"id": 1, "brand": "Toyota", "model": "Corolla", "year": 2018,
+                    "buy_price": 12000.0, "sell_price": None, "is_sold": False}
+        self.flask = {"id": 2, "make": "Honda", "model": "Civic", "year": 2021, "price": 22080, "status": "sold"}
+
+    def test_reads_like_the_record(self):
+        car = Car.from_dict(self.cli)
+        self.assertEqual(car, self.cli)
+        self.assertEqual(car["brand"], "Toyota")
+        self.assertIsNone(car.get("sell_price"))
+        self.assertNotIn("make", car)
+        flask_car = Car.from_dict(self.flask)
+        self.assertEqual(flask_car["status"], "sold")
+        self.assertNotIn("is_sold", flask_car)
+        self.assertEqual((flask_car.brand, flask_car.buy_price, flask_car.is_sold), ("Honda", 22080, True))
+
+    def test_schema_conversion_is_lossless(self):
+        cli_car = Car.from_dict(self.cli)
+        self.assertEqual(Car.from_dict(cli_car.to_dict("flask")).to_dict("cli"), self.cli)
+        flask_car = Car.from_dict(self.flask)
+        self.assertEqual(Car.from_dict(flask_car.to_dict("cli")).to_dict("flask"), self.flask)
+        # A converted Flask record is a complete CLI record
+        self.assertEqual(flask_car.to_dict("cli"), {"id": 2, "brand": "Honda", "model": "Civic", "year": 2021,
+                                                    "buy_price": 22080, "sell_price": None, "is_sold": True})
+
+    def test_extra_and_missing_fields_round_trip(self):
+        record = {"id": 3, "brand": "Ford", "added_on": 19000}
+        car = Car.from_dict(record)
+        self.assertEqual(car.to_dict(), record)
+        self.assertEqual(len(car), 3)
+        self.assertNotIn("model", car)
+
+    def test_replace_returns_a_new_car(self):
+        car = Car.from_dict(self.flask)
+        available = car.replace(status="available")
+        self.assertEqual(car["status"], "sold")
+        self.assertEqual(available["status"], "available")
+        with self.assertRaises(ValueError):
+            car.replace(status="stolen")
+
+    def test_json_hook(self):
+        self.assertEqual(json.loads(json.dumps([Car.from_dict(self.cli)], default=to_json)), [self.cli])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import unittest
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'app')))
+
+from changes import ChangeLog, ChangesExpired, event_stream
+from storage import StorageContext
+from store import VersionedStore, WriteBehindStore
+
+
+class TestChangeLog(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'inventory.json')
+        self.initial = [{"id": 1, "make": "Toyota", "model": "Camry", "year": 2020, "price": 24090, "status": "available"}]
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _versions(self, entries):
+        return [entry["version"] for entry in entries]
+
+    def test_store_logs_each_version(self):
+        store = VersionedStore(StorageContext(self.path), self.initial)
+        store.snapshot()
+        store.update(lambda inventory: inventory.update(1, status='sold'))
+        store.update(lambda inventory: inventory.remove(1))
+        entries = store.changes.since(0)
+        self.assertEqual(self._versions(entries), [1, 2, 3])
+        self.assertEqual(entries[0]["changes"], [{"op": "put", "car": self.initial[0]}])
+        self.assertEqual(entries[1]["changes"][0]["car"]["status"], "sold")
+        self.assertEqual(entries[2]["changes"], [{"op": "del", "id": 1}])
+        self.assertEqual(store.changes.since(3), [])
+        # Another process reading the same log sees the same entries
+        self.assertEqual(ChangeLog(self.path + '.changes').since(1), entries[1:])
+
+    def test_old_or_reset_versions_expire(self):
+        log = ChangeLog(os.path.join(self.tmp.name, 'log'), max_bytes=200)
+        for version in range(1, 11):
+            log.append(version, [("del", version)])
+        with self.assertRaises(ChangesExpired):
+            log.since(0)
+        self.assertEqual(self._versions(log.since(9)), [10])
+        log.append(11, None)
+        with self.assertRaises(ChangesExpired):
+            log.since(9)
+        self.assertEqual(log.since(11), [])
+
+    def test_versions_going_back_expire(self):
+        log = ChangeLog(os.path.join(self.tmp.name, 'log'))
+        for version, price in ((1, 1), (2, 2), (3, 3), (2, 4)):
+            log.append(version, [("put", {"id": 1, "price": price})])
+        self.assertEqual([entry["changes"][0]["car"]["price"] for entry in log.since(1)], [4])
+        for version in (2, 3):
+            with self.assertRaises(ChangesExpired):
+                log.since(version)
+
+    def test_write_behind_logs_once_durable(self):
+        store = WriteBehindStore(VersionedStore(StorageContext(self.path), self.initial), "interval", 60)
+        store.update(lambda inventory: inventory.update(1, price=100))
+        self.assertEqual(store.changes.since(1), [])
+        store.flush()
+        self.assertEqual(self._versions(store.changes.since(1)), [2])
+        store.close()
+
+    def test_write_behind_logs_every_update(self):
+        store = WriteBehindStore(VersionedStore(StorageContext(self.path), self.initial), "group")
+        store.update(lambda inventory: inventory.update(1, price=100))
+        store.update(lambda inventory: inventory.update(1, price=200))
+        store.close()
+        prices = [entry["changes"][0]["car"]["price"] for entry in store.changes.since(1)]
+        self.assertEqual(prices, [100, 200])
+
+    def test_event_stream(self):
+        log = ChangeLog(os.path.join(self.tmp.name, 'log'))
+        log.append(1, [("del", 4)])
+        events = event_stream(log, 0, poll_interval=0)
+        self.assertTrue(next(events).startswith("retry:"))
+        self.assertEqual(next(events), 'id: 1\nevent: change\ndata: {"version":1,"changes":[{"op":"del","id":4}]}\n\n')
+        log.append(2, None)
+        self.assertTrue(next(events).startswith("event: reset"))
+
+
+if __name__ == '__main__':
+    unittest.main()
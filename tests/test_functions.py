@@ -2,19 +2,21 @@ import unittest
 from unittest.mock import patch, MagicMock
 import sys
 import os
+import tempfile
 
 # Add app directory to path so we can import functions
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'app')))
 
 import functions
+from inventory import Inventory
 
 class TestCarLotFunctions(unittest.TestCase):
 
     def setUp(self):
-        self.inventory = [
+        self.inventory = Inventory([
             {"id": 1, "brand": "Toyota", "model": "Corolla", "year": 2018, "buy_price": 12000.0, "sell_price": None, "is_sold": False},
             {"id": 2, "brand": "Honda", "model": "Civic", "year": 2019, "buy_price": 14000.0, "sell_price": 15000.0, "is_sold": True}
-        ]
+        ])
 
     @patch('builtins.input', side_effect=['3', 'Ford', 'Focus', '2020', '10000'])
     @patch('storage.save_inventory')
@@ -68,5 +70,53 @@ class TestCarLotFunctions(unittest.TestCase):
         self.assertEqual(self.inventory[1]['sell_price'], 15000.0)
         mock_save.assert_not_called()
 
+    @patch('storage.save_inventory')
+    @patch('builtins.print')
+    def test_import_cars_saves_once(self, mock_print, mock_save):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as fh:
+            fh.write("id,brand,model,year,buy_price\n"
+                     "3,Ford,Focus,2017,9000\n"
+                     "1,Kia,Rio,2020,5000\n"
+                     "4,Ford2,Fiesta,2016,7000\n"
+                     "5,Mazda,3,2019,-1\n"
+                     "6,Mazda,6,2021,18000\n")
+        self.addCleanup(os.remove, fh.name)
+        added = functions.import_cars(self.inventory, fh.name)
+        self.assertEqual(added, 2)
+        self.assertEqual([car['id'] for car in self.inventory], [1, 2, 3, 6])
+        mock_save.assert_called_once()
+
+    @patch('storage.save_inventory')
+    @patch('builtins.print')
+    def test_import_cars_strict(self, mock_print, mock_save):
+        with tempfile.NamedTemporaryFile('w', suffix='.ndjson', delete=False) as fh:
+            fh.write('{"id": 3, "brand": "Ford", "model": "Focus", "year": 2017, "buy_price": 9000}\n'
+                     '{"id": 2, "brand": "Kia", "model": "Rio", "year": 2020, "buy_price": 5000}\n')
+        self.addCleanup(os.remove, fh.name)
+        self.assertEqual(functions.import_cars(self.inventory, fh.name, strict=True), 0)
+        self.assertEqual(len(self.inventory), 2)
+        mock_save.assert_not_called()
+
+    @patch('analytics.available', return_value=False)
+    @patch('builtins.print')
+    def test_show_stats_without_numpy(self, mock_print, mock_available):
+        functions.show_stats(self.inventory)
+        printed = [call.args[0] for call in mock_print.call_args_list]
+        self.assertIn("Total Cars: 2", printed)
+        self.assertTrue(printed[-1].startswith("Install numpy"))
+
+    @patch('builtins.input', side_effect=['-year'])
+    @patch('storage.save_inventory')
+    @patch('builtins.print')
+    def test_sort_cars_only_displays(self, mock_print, mock_save, mock_input):
+        functions.sort_cars(self.inventory)
+        printed = [call.args[0] for call in mock_print.call_args_list]
+        self.assertTrue(printed[0].startswith("2 | Honda"))
+        self.assertTrue(printed[1].startswith("1 | Toyota"))
+        # The stored order is unchanged and nothing is written
+        self.assertEqual([car['id'] for car in self.inventory], [1, 2])
+        mock_save.assert_not_called()
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,145 @@
+import unittest
+import sys
+import os
+import threading
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'app')))
+
+from inventory import Inventory
+from views import parse_sort_spec
+
+
+class TestInventory(unittest.TestCase):
+
+    def setUp(self):
+        self.inventory = Inventory([
+            {"id": 1, "brand": "Toyota", "model": "Corolla", "year": 2018, "buy_price": 12000.0, "sell_price": None, "is_sold": False},
+            {"id": 5, "brand": "Honda", "model": "Civic", "year": 2019, "buy_price": 14000.0, "sell_price": 15000.0, "is_sold": True}
+        ])
+
+    def test_get_accepts_string_ids(self):
+        self.assertEqual(self.inventory.get("5")["brand"], "Honda")
+        self.assertEqual(self.inventory.get(" 1 ")["brand"], "Toyota")
+        self.assertIsNone(self.inventory.get("abc"))
+        self.assertIsNone(self.inventory.get(99))
+
+    def test_next_id_follows_highest_id(self):
+        self.assertEqual(self.inventory.next_id(), 6)
+        self.inventory.add({"id": 6, "brand": "Ford"})
+        self.assertEqual(self.inventory.next_id(), 7)
+        self.inventory.remove(6)
+        # Removed IDs are never handed out again
+        self.assertEqual(self.inventory.next_id(), 7)
+
+    def test_add_rejects_duplicate_id(self):
+        with self.assertRaises(ValueError):
+            self.inventory.add({"id": 1, "brand": "Ford"})
+        self.assertEqual(len(self.inventory), 2)
+
+    def test_remove_keeps_insertion_order(self):
+        self.inventory.add({"id": 3, "brand": "Ford"})
+        self.assertEqual(self.inventory.remove("5")["brand"], "Honda")
+        self.assertEqual([car["id"] for car in self.inventory], [1, 3])
+        self.assertIsNone(self.inventory.remove(5))
+
+    def test_update(self):
+        self.inventory.update(1, is_sold=True, sell_price=13000.0)
+        self.assertTrue(self.inventory.get(1)["is_sold"])
+        self.assertIsNone(self.inventory.update(42, is_sold=True))
+
+    def test_copy_does_not_share_changes(self):
+        clone = self.inventory.copy()
+        clone.update(1, is_sold=True)
+        clone.remove(5)
+        self.assertFalse(self.inventory.get(1)["is_sold"])
+        self.assertIn(5, self.inventory)
+
+    def test_stats_follow_changes(self):
+        stats = self.inventory.stats()
+        self.assertEqual((stats.total, stats.sold), (2, 1))
+        self.inventory.add({"id": 6, "brand": "Ford", "model": "Focus", "year": 2017,
+                            "buy_price": 9000.0, "sell_price": None, "is_sold": False})
+        self.inventory.update(1, is_sold=True, sell_price=12500.0)
+        self.inventory.remove(5)
+        self.assertIs(self.inventory.stats(), stats)
+        self.assertEqual(stats.to_dict(), {
+            "total": 2, "sold": 1, "unsold": 1, "available_value": 9000.0,
+            "average_buy_price": 10500.0, "total_profit": 500.0, "average_profit": 500.0,
+        })
+
+    def test_copy_keeps_stats_separate(self):
+        self.inventory.stats()
+        clone = self.inventory.copy()
+        clone.remove(1)
+        self.assertEqual(clone.stats().total, 1)
+        self.assertEqual(self.inventory.stats().total, 2)
+
+
+    def test_sorted_view_multi_key_with_none_last(self):
+        self.inventory.add({"id": 2, "brand": "Honda", "model": "Jazz", "year": 2021, "buy_price": 9000.0,
+                            "sell_price": 11000.0, "is_sold": True})
+        spec = parse_sort_spec("brand,-sell_price")
+        self.assertEqual([car["id"] for car in self.inventory.sorted_by(spec)], [5, 2, 1])
+        # None sorts last in either direction
+        for text in ("sell_price", "-sell_price"):
+            self.assertEqual(self.inventory.sorted_by(parse_sort_spec(text))[-1]["id"], 1)
+        self.assertEqual([car["id"] for car in self.inventory], [1, 5, 2])
+
+    def test_sorted_view_follows_changes(self):
+        spec = parse_sort_spec("-year")
+        view = self.inventory.sorted_view(spec)
+        self.inventory.add({"id": 7, "brand": "Kia", "model": "Rio", "year": 2019, "buy_price": 1.0,
+                            "sell_price": None, "is_sold": False})
+        self.inventory.update(1, year=2025)
+        self.inventory.remove(5)
+        self.assertIs(self.inventory.sorted_view(spec), view)
+        self.assertEqual(view.ids(), [1, 7])
+        copy = self.inventory.copy()
+        copy.remove(1)
+        self.assertEqual(copy.sorted_view(spec).ids(), [7])
+        self.assertEqual(view.ids(), [1, 7])
+
+    def test_observers_registered_while_copying(self):
+        inventory = Inventory([{"id": i, "make": "Kia", "model": "Rio", "year": 2020, "price": i,
+                                "status": "available"} for i in range(1, 51)]).freeze()
+        builds = []
+        errors = []
+        registering = threading.Event()
+
+        def register():
+            registering.wait()
+            for i in range(5000):
+                # A factory may use another observer
+                inventory.observer(f"view:{i}", lambda inv: builds.append(1) or inv.stats().copy())
+
+        def copy():
+            registering.set()
+            try:
+                while any(t.is_alive() for t in registers):
+                    inventory.copy()
+            except RuntimeError as e:
+                errors.append(e)
+
+        registers = [threading.Thread(target=register) for _ in range(2)]
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            for t in registers:
+                t.start()
+            copy()
+            for t in registers:
+                t.join()
+        finally:
+            sys.setswitchinterval(interval)
+        self.assertEqual(errors, [])
+        # Each observer was built once even though two threads asked for it
+        self.assertEqual(len(builds), 5000)
+
+    def test_parse_sort_spec(self):
+        self.assertEqual(parse_sort_spec("brand, -year"), (("brand", False), ("year", True)))
+        with self.assertRaises(ValueError):
+            parse_sort_spec(" , ")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'app')))
+
+import metrics
+from metrics import Registry
+
+
+class TestRegistry(unittest.TestCase):
+
+    def test_histogram_buckets_are_cumulative(self):
+        registry = Registry()
+        latency = registry.histogram("latency_seconds", "Latency.", ("route",), buckets=(0.1, 1.0))
+        latency.observe(0.05, "/")
+        latency.observe(0.5, "/")
+        latency.observe(5, "/")
+        lines = registry.render().splitlines()
+        self.assertIn('latency_seconds_bucket{route="/",le="0.1"} 1', lines)
+        self.assertIn('latency_seconds_bucket{route="/",le="1.0"} 2', lines)
+        self.assertIn('latency_seconds_bucket{route="/",le="+Inf"} 3', lines)
+        self.assertIn('latency_seconds_count{route="/"} 3', lines)
+        self.assertIn('latency_seconds_sum{route="/"} 5.55', lines)
+
+    def test_counter_and_gauge(self):
+        registry = Registry()
+        requests = registry.counter("requests_total", "Requests.", ("path",))
+        requests.inc(1, 'a"b')
+        requests.inc(2, 'a"b')
+        registry.gauge("cars", "Cars.").set(7)
+        text = registry.render()
+        self.assertIn('# TYPE requests_total counter', text)
+        self.assertIn('requests_total{path="a\\"b"} 3', text)
+        self.assertIn('\ncars 7\n', text)
+
+    def test_shared_registries_add_up(self):
+        def worker(requests, hits, misses, version):
+            registry = Registry()
+            registry.counter("requests_total", "Requests.", ("path",)).inc(requests, "/")
+            hit_gauge = registry.gauge("hits", "Hits.", ("cache",))
+            miss_gauge = registry.gauge("misses", "Misses.", ("cache",))
+            hit_gauge.set(hits, "file")
+            miss_gauge.set(misses, "file")
+            registry.ratio("hit_ratio", "Hits / lookups.", hit_gauge, miss_gauge)
+            registry.gauge("version", "Version.", merge="last").set(version)
+            registry.gauge("file_bytes", "File size.", merge="last").set(1000)
+            registry.directory = metrics.Path(directory)
+            return registry
+
+        directory = tempfile.mkdtemp()
+        # Files are named by pid: move the first worker's aside so the second has its own
+        worker(2, 3, 1, 7).dump()
+        os.replace(os.path.join(directory, f"{os.getpid()}.json"), os.path.join(directory, "1.json"))
+        lines = worker(5, 1, 3, 8).render().splitlines()
+        self.assertIn('requests_total{path="/"} 7', lines)
+        self.assertIn('hits{cache="file"} 4', lines)
+        self.assertIn('hit_ratio{cache="file"} 0.5', lines)
+        self.assertIn('version 8', lines)
+        # One file, however many workers have read it
+        self.assertIn('file_bytes 1000', lines)
+        self.assertEqual(metrics.STORAGE_FILE_BYTES.merge_mode, "last")
+
+    def test_share_writes_state_periodically(self):
+        directory = tempfile.mkdtemp()
+        registry = Registry()
+        registry.counter("requests_total", "Requests.").inc(3)
+        registry.share(directory)
+        self.assertIn('\nrequests_total 3\n', registry.render())
+        self.assertTrue(os.path.exists(os.path.join(directory, f"{os.getpid()}.json")))
+
+
+if __name__ == '__main__':
+    unittest.main()
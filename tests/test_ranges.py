@@ -0,0 +1,59 @@
+import unittest
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'app')))
+
+from inventory import Inventory
+from query import InventoryQuery
+
+
+class TestRangeIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.inventory = Inventory([
+            {"id": 1, "brand": "Toyota", "model": "Camry", "year": 2018, "buy_price": 14000, "sell_price": None, "is_sold": False},
+            {"id": 2, "brand": "Honda", "model": "Civic", "year": 2021, "buy_price": 16000, "sell_price": 19000, "is_sold": True},
+            {"id": 3, "brand": "Ford", "model": "Focus", "year": 2019, "buy_price": 9000, "sell_price": None, "is_sold": False},
+            {"id": 4, "brand": "Kia", "model": "Rio", "year": 2023, "buy_price": 12000, "sell_price": None, "is_sold": False},
+        ])
+
+    def _ids(self, cars):
+        return [car["id"] for car in cars]
+
+    def test_between(self):
+        self.assertEqual(self._ids(self.inventory.between(year=(2018, 2021), buy_price=(None, 15000))), [1, 3])
+        self.assertEqual(self._ids(self.inventory.between(year=(2020, None))), [2, 4])
+        self.assertEqual(self._ids(self.inventory.between(sell_price=(None, None))), [1, 2, 3, 4])
+        self.assertEqual(self._ids(self.inventory.between(sell_price=(0, None))), [2])
+        self.assertEqual(self._ids(self.inventory.between(year=(2024, 2020))), [])
+
+    def test_index_and_histogram_follow_changes_and_copies(self):
+        index = self.inventory.range_index("buy_price")
+        self.assertEqual(index.histogram(), [{"from": 5000, "to": 10000, "count": 1},
+                                             {"from": 10000, "to": 15000, "count": 2},
+                                             {"from": 15000, "to": 20000, "count": 1}])
+        copy = self.inventory.copy()
+        copy.update(3, buy_price=21000)
+        copy.remove(4)
+        self.assertEqual(copy.range_index("buy_price").ids(None, 15000), [1])
+        self.assertEqual([b["from"] for b in copy.range_index("buy_price").histogram()], [10000, 15000, 20000])
+        self.assertEqual(index.ids(None, 15000), [3, 4, 1])
+        self.assertEqual(self.inventory.range_index("year").histogram()[0], {"from": 2018, "to": 2019, "count": 1})
+
+    def test_query_uses_index_for_narrow_ranges(self):
+        inventory = Inventory({"id": i, "make": "Kia", "model": "Rio", "year": 2000 + i % 20,
+                               "price": 1000 * i, "status": "available"} for i in range(1, 101))
+        query = InventoryQuery(min_year=2005, max_year=2006, max_price=60000, limit=5)
+        self.assertEqual(len(query._candidate_ids(inventory)), 10)
+        page, cursor = query.run(inventory)
+        self.assertEqual([car["id"] for car in page], [5, 6, 25, 26, 45])
+        query.after = cursor
+        page, cursor = query.run(inventory)
+        self.assertEqual([car["id"] for car in page], [46])
+        self.assertIsNone(cursor)
+        self.assertIsNone(InventoryQuery(min_price=1)._candidate_ids(inventory))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'app')))
+
+from inventory import Inventory
+
+
+class TestSearchIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.inventory = Inventory([
+            {"id": 1, "make": "Toyota", "model": "Camry", "year": 2020, "price": 24090, "status": "available"},
+            {"id": 2, "make": "Tesla", "model": "Model 3", "year": 2023, "price": 42020, "status": "available"},
+            {"id": 3, "make": "Toyota", "model": "Corolla", "year": 2019, "price": 18000, "status": "sold"},
+        ])
+
+    def _ids(self, query, inventory=None, **kwargs):
+        return [car["id"] for car in (inventory or self.inventory).search(query, **kwargs)]
+
+    def test_prefix_and_multiple_words(self):
+        self.assertEqual(self._ids("t"), [1, 2, 3])
+        self.assertEqual(self._ids("toy co"), [3])
+        self.assertEqual(self._ids("model 3"), [2])
+        self.assertEqual(self._ids("TOYOTA", limit=1), [1])
+        self.assertEqual(self._ids(""), [])
+
+    def test_fuzzy_match_when_no_prefix_matches(self):
+        self.assertEqual(self._ids("toyta"), [1, 3])
+        self.assertEqual(self._ids("corola"), [3])
+        self.assertEqual(self._ids("ford"), [])
+
+    def test_index_follows_changes_and_copies(self):
+        self.inventory.search("x")
+        snapshot = self.inventory.copy()
+        self.inventory.update(1, model="Corolla")
+        self.inventory.remove(3)
+        self.inventory.add({"id": 4, "make": "Kia", "model": "Rio", "year": 2020, "price": 100, "status": "available"})
+        self.assertEqual(self._ids("corolla"), [1])
+        self.assertEqual(self._ids("kia"), [4])
+        self.assertEqual(self._ids("camry"), [])
+        # The copy taken before the changes still answers for its own cars
+        self.assertEqual(self._ids("corolla", snapshot), [3])
+        self.assertEqual(self._ids("camry", snapshot), [1])
+
+
+if __name__ == '__main__':
+    unittest.main()
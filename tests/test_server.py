@@ -0,0 +1,92 @@
+import unittest
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'app'))
+sys.path.append(APP_DIR)
+
+from server import DrainingServer
+
+
+class TestDrainingServer(unittest.TestCase):
+
+    def test_stop_waits_for_requests_in_progress(self):
+        started, finished = threading.Event(), threading.Event()
+
+        def slow_app(environ, start_response):
+            started.set()
+            time.sleep(0.3)
+            finished.set()
+            start_response('200 OK', [('Content-Type', 'text/plain')])
+            return [b'done']
+
+        server = DrainingServer('127.0.0.1', 0, slow_app)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        responses = []
+        client = threading.Thread(target=lambda: responses.append(
+            urllib.request.urlopen(f'http://127.0.0.1:{server.port}/', timeout=5).read()))
+        client.start()
+        self.assertTrue(started.wait(5))
+        server.shutdown()
+        server.socket.close()
+        self.assertTrue(server.drain(5))
+        self.assertTrue(finished.is_set())
+        client.join()
+        self.assertEqual(responses, [b'done'])
+
+
+@unittest.skipUnless(hasattr(os, 'fork'), "needs fork")
+class TestPreforkServer(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        with socket.socket() as s:
+            s.bind(('127.0.0.1', 0))
+            self.port = s.getsockname()[1]
+        env = dict(os.environ, DATA_FILE=os.path.join(self.tmp.name, 'inventory.json'), CARLOT_WORKERS='3')
+        self.process = subprocess.Popen(
+            [sys.executable, 'server.py', '--host', '127.0.0.1', '--port', str(self.port)],
+            cwd=APP_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        self.addCleanup(self._stop)
+        self.base = f'http://127.0.0.1:{self.port}'
+        deadline = time.monotonic() + 15
+        while True:
+            try:
+                urllib.request.urlopen(self.base + '/health', timeout=1).close()
+                break
+            except OSError:
+                if time.monotonic() > deadline or self.process.poll() is not None:
+                    self.fail("server did not start")
+                time.sleep(0.1)
+
+    def _stop(self):
+        if self.process.poll() is None:
+            self.process.kill()
+            self.process.wait()
+        self.tmp.cleanup()
+
+    def _get(self, path):
+        with urllib.request.urlopen(self.base + path, timeout=5) as response:
+            return json.load(response)
+
+    def test_workers_see_each_others_changes_and_stop_on_sigterm(self):
+        data = b'make=Kia&model=Rio&year=2020&price=100'
+        request = urllib.request.Request(self.base + '/add', data=data, method='POST')
+        urllib.request.urlopen(request, timeout=5).close()
+        # New connections are spread over the workers; every one must see the car
+        for _ in range(12):
+            self.assertEqual(self._get('/api/inventory')[-1]["make"], "Kia")
+        self.process.send_signal(signal.SIGTERM)
+        self.assertEqual(self.process.wait(timeout=15), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,206 @@
+import unittest
+from unittest.mock import patch
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'app')))
+
+import storage
+import binary_store
+from changes import ChangesExpired
+from inventory import Inventory
+
+
+class TestJournalStorage(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.data_file = Path(self.tmp.name) / "inventory.json"
+        self.journal_file = Path(self.tmp.name) / "inventory.journal"
+        storage.set_context(storage.resolve_context(self.data_file, backend="journal"))
+        patcher = patch.dict(os.environ, {"CARLOT_JOURNAL_COMPACT_EVERY": "5"})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        storage.set_context(None)
+        self.tmp.cleanup()
+
+    def _journal_lines(self):
+        return self.journal_file.read_text().splitlines()
+
+    def test_duplicate_ids_are_renumbered_not_dropped(self):
+        car = {"id": 1, "brand": "Kia", "model": "Rio", "year": 2019, "buy_price": 5000.0,
+               "sell_price": None, "is_sold": False}
+        self.data_file.write_text(json.dumps([car, dict(car, model="Ceed"), dict(car, id=2)]))
+        with self.assertWarns(UserWarning):
+            cars = storage.load_inventory()
+        self.assertEqual([(car["id"], car["model"]) for car in cars], [(1, "Rio"), (2, "Rio"), (3, "Ceed")])
+        # Written back, so the next load needs no repair
+        self.assertEqual([car["id"] for car in json.loads(self.data_file.read_text())], [1, 2, 3])
+
+    def test_changes_are_appended_not_rewritten(self):
+        inventory = Inventory(storage.load_inventory())
+        snapshot = self.data_file.read_text()
+        inventory.update(1, is_sold=True, sell_price=13000.0)
+        inventory.remove(3)
+        storage.save_inventory(inventory)
+        self.assertEqual(self.data_file.read_text(), snapshot)
+        self.assertEqual(len(self._journal_lines()), 2)
+
+        reloaded = storage.load_inventory()
+        self.assertEqual([car["id"] for car in reloaded], [1, 2])
+        self.assertTrue(reloaded[0]["is_sold"])
+
+    def test_torn_tail_is_dropped(self):
+        inventory = Inventory(storage.load_inventory())
+        inventory.update(1, model="Camry")
+        storage.save_inventory(inventory)
+        with self.journal_file.open("a") as fh:
+            fh.write('{"op":"put","car":{"id":9,')
+
+        with self.assertWarns(UserWarning):
+            reloaded = storage.load_inventory()
+        self.assertEqual(len(reloaded), 3)
+        self.assertEqual(reloaded[0]["model"], "Camry")
+        self.assertEqual(len(self._journal_lines()), 1)
+
+    def test_compaction_folds_journal_into_snapshot(self):
+        inventory = Inventory(storage.load_inventory())
+        for car_id in range(10, 16):
+            inventory.add({"id": car_id, "brand": "Ford", "model": "Focus", "year": 2017,
+                           "buy_price": 9000.0, "sell_price": None, "is_sold": False})
+            storage.save_inventory(inventory)
+        with self.data_file.open() as fh:
+            snapshot_ids = [car["id"] for car in json.load(fh)]
+        self.assertIn(14, snapshot_ids)
+        self.assertEqual([car["id"] for car in storage.load_inventory()],
+                         [1, 2, 3, 10, 11, 12, 13, 14, 15])
+
+    def test_json_mode_folds_leftover_journal(self):
+        inventory = Inventory(storage.load_inventory())
+        inventory.remove(2)
+        storage.save_inventory(inventory)
+        storage.set_context(storage.resolve_context(self.data_file, backend="json"))
+        reloaded = storage.load_inventory()
+        self.assertEqual([car["id"] for car in reloaded], [1, 3])
+        self.assertFalse(self.journal_file.exists())
+
+
+class TestSqliteStorage(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.data_file = Path(self.tmp.name) / "inventory.json"
+        with patch.dict(os.environ, {"CARLOT_STORAGE": "sqlite"}):
+            self.context = storage.resolve_context(self.data_file)
+        storage.set_context(self.context)
+
+    def tearDown(self):
+        self.context.sqlite.close()
+        storage.set_context(None)
+        self.tmp.cleanup()
+
+    def test_imports_existing_json_once(self):
+        cars = [{"id": 7, "brand": "Kia", "model": "Rio", "year": 2020,
+                 "buy_price": 5000.0, "sell_price": None, "is_sold": False}]
+        self.data_file.write_text(json.dumps(cars))
+        self.assertEqual(storage.load_inventory(), cars)
+
+        inventory = Inventory(storage.load_inventory())
+        inventory.remove(7)
+        storage.save_inventory(inventory)
+        # An emptied database is not re-seeded from the JSON file
+        self.assertEqual(storage.load_inventory(), [])
+
+    def test_row_level_changes_keep_order(self):
+        inventory = Inventory(storage.load_inventory())
+        inventory.add({"id": 10, "brand": "Kia", "model": "Rio", "year": 2020,
+                       "buy_price": 5000.0, "sell_price": None, "is_sold": False})
+        inventory.update(1, is_sold=True, sell_price=12500.0)
+        inventory.remove(2)
+        storage.save_inventory(inventory)
+
+        reloaded = storage.load_inventory()
+        self.assertEqual([car["id"] for car in reloaded], [1, 3, 10])
+        self.assertIs(reloaded[0]["is_sold"], True)
+        self.assertEqual(reloaded[0]["sell_price"], 12500.0)
+
+    def test_database_uses_wal(self):
+        storage.load_inventory()
+        mode = self.context.sqlite._conn.execute("PRAGMA journal_mode").fetchone()[0]
+        self.assertEqual(mode, "wal")
+
+
+class TestBinaryStorage(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.data_file = Path(self.tmp.name) / "inventory.bin"
+        storage.set_context(storage.resolve_context(self.data_file, backend="json"))
+
+    def tearDown(self):
+        storage.set_context(None)
+        self.tmp.cleanup()
+
+    def test_round_trip_is_lazy(self):
+        inventory = Inventory(storage.load_inventory())
+        inventory.update(1, is_sold=True, sell_price=13000.0)
+        storage.save_inventory(inventory)
+        records = storage.get_context().read_file()
+        self.assertIsInstance(records, binary_store.BinaryRecords)
+        self.assertEqual(len(records), 3)
+        self.assertEqual(records[-1]["brand"], "Ford")
+        self.assertIsNone(records[2]["sell_price"])
+        self.assertEqual(list(records), inventory.to_list())
+
+    def test_converts_to_and_from_json(self):
+        flask_cars = [{"id": 1, "make": "Kia", "model": "Rio", "year": 2019, "price": 9000, "status": "sold"}]
+        json_file = Path(self.tmp.name) / "flask.json"
+        json_file.write_text(json.dumps(flask_cars))
+        self.assertEqual(binary_store.convert(json_file, self.data_file), 1)
+        back = Path(self.tmp.name) / "back.json"
+        binary_store.convert(self.data_file, back)
+        self.assertEqual(json.loads(back.read_text()), flask_cars)
+
+    def test_unknown_fields_are_rejected(self):
+        with self.assertRaises(ValueError):
+            binary_store.encode([{"id": 1, "make": "Kia", "model": "Rio", "year": 2019,
+                                  "price": 9000, "status": "sold", "vin": "X"}])
+
+
+class TestStorageContext(unittest.TestCase):
+
+    @patch('storage._data_file')
+    def test_location_is_resolved_once(self, mock_data_file):
+        with tempfile.TemporaryDirectory() as tmp:
+            mock_data_file.return_value = Path(tmp) / "inventory.json"
+            storage.set_context(None)
+            self.addCleanup(storage.set_context, None)
+            storage.save_inventory(storage.load_inventory())
+            storage.load_inventory()
+            self.assertEqual(mock_data_file.call_count, 1)
+            self.assertEqual(storage.get_context().path, Path(tmp) / "inventory.json")
+
+    def test_saves_are_versioned_in_the_change_log(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            context = storage.resolve_context(Path(tmp) / "inventory.json", backend="json")
+            inventory = Inventory(context.load())
+            self.assertEqual(context.version(), 1)
+            inventory.update(1, is_sold=True, sell_price=13000.0)
+            self.assertEqual(context.save(inventory), 2)
+            entries = context.changes.since(1)
+            self.assertEqual([entry["version"] for entry in entries], [2])
+            self.assertEqual(entries[0]["changes"][0]["op"], "put")
+            self.assertEqual(entries[0]["changes"][0]["car"]["sell_price"], 13000.0)
+            # A save without changes (a plain list) tells readers to start over
+            context.save(inventory.to_list())
+            with self.assertRaises(ChangesExpired):
+                context.changes.since(2)
+
+
+if __name__ == '__main__':
+    unittest.main()
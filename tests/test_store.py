@@ -0,0 +1,219 @@
+import unittest
+import json
+import os
+import sys
+import tempfile
+import threading
+from unittest.mock import patch
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'app')))
+
+from storage import StorageContext
+from store import VersionedStore, VersionConflict, WriteBehindStore
+
+
+class TestVersionedStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'data', 'inventory.json')
+        self.initial = [{"id": 1, "make": "Toyota", "model": "Camry", "year": 2020, "price": 24090, "status": "available"}]
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_snapshot_seeds_initial_data(self):
+        version, inventory = VersionedStore(StorageContext(self.path), self.initial).snapshot()
+        self.assertEqual(version, 1)
+        self.assertEqual(inventory.to_list(), self.initial)
+
+    def test_unsupported_backends_are_refused(self):
+        for backend in ("journal", "sqlite"):
+            with self.assertRaises(ValueError):
+                VersionedStore(StorageContext(self.path, backend=backend), self.initial)
+
+    def test_stale_commit_conflicts(self):
+        store = VersionedStore(StorageContext(self.path), self.initial)
+        version, inventory = store.snapshot()
+        store.commit(version, inventory.copy())
+        with self.assertRaises(VersionConflict):
+            store.commit(version, inventory.copy())
+
+    def test_expected_version_is_not_retried(self):
+        store = VersionedStore(StorageContext(self.path), self.initial)
+        version, _ = store.snapshot()
+        store.update(lambda inventory: inventory.update(1, status='sold'))
+        with self.assertRaises(VersionConflict):
+            store.update(lambda inventory: inventory.remove(1), expected_version=version)
+        self.assertIn(1, store.snapshot()[1])
+
+    def test_snapshots_are_read_only(self):
+        store = VersionedStore(StorageContext(self.path), self.initial)
+        snapshot = store.snapshot()
+        with self.assertRaises(TypeError):
+            snapshot.inventory.remove(1)
+        store.update(lambda inventory: inventory.update(1, status='sold'))
+        # Earlier snapshots keep what they had
+        self.assertEqual(snapshot.inventory.get(1)["status"], "available")
+        self.assertEqual(store.snapshot().inventory.get(1)["status"], "sold")
+
+    def test_duplicate_ids_in_the_file_are_renumbered(self):
+        os.makedirs(os.path.dirname(self.path))
+        with open(self.path, 'w') as f:
+            json.dump(self.initial + [dict(self.initial[0], model="Corolla")], f)
+        store = VersionedStore(StorageContext(self.path), self.initial)
+        with self.assertWarns(UserWarning):
+            inventory = store.snapshot().inventory
+        self.assertEqual([(car["id"], car["model"]) for car in inventory], [(1, "Camry"), (2, "Corolla")])
+        # The next commit writes the repaired inventory
+        store.update(lambda inventory: inventory.update(2, status='sold'))
+        with open(self.path) as f:
+            self.assertEqual([car["id"] for car in json.load(f)], [1, 2])
+
+    def test_unreadable_file_serves_last_good_snapshot(self):
+        store = VersionedStore(StorageContext(self.path), self.initial)
+        store.update(lambda inventory: inventory.update(1, status='sold'))
+        with open(self.path, 'a') as f:
+            f.write("garbage")
+        snapshot = store.snapshot()
+        self.assertEqual(snapshot.inventory.get(1)["status"], "sold")
+
+    def test_readers_never_see_a_torn_version(self):
+        writer = VersionedStore(StorageContext(self.path), self.initial)
+        writer.snapshot()
+        reader = VersionedStore(StorageContext(self.path))
+        seen = []
+        done = threading.Event()
+
+        def read():
+            while not done.is_set():
+                seen.append(reader._read_version())
+
+        thread = threading.Thread(target=read)
+        thread.start()
+        try:
+            for price in range(200):
+                writer.update(lambda inventory: inventory.update(1, price=price))
+        finally:
+            done.set()
+            thread.join()
+        self.assertNotIn(0, seen)
+        self.assertEqual(seen, sorted(seen))
+
+    def test_version_is_read_from_the_lock_file_of_older_stores(self):
+        os.makedirs(os.path.dirname(self.path))
+        with open(self.path + '.lock', 'w') as f:
+            f.write('7')
+        self.assertEqual(VersionedStore(StorageContext(self.path))._read_version(), 7)
+
+    def test_concurrent_writers_lose_no_updates(self):
+        writers, adds_per_writer = 8, 25
+        VersionedStore(StorageContext(self.path), self.initial).snapshot()
+        errors = []
+
+        def writer():
+            # Separate store per thread, like separate replicas with their own caches
+            store = VersionedStore(StorageContext(self.path), self.initial)
+            try:
+                for _ in range(adds_per_writer):
+                    store.update(lambda inventory: inventory.add({
+                        "id": inventory.next_id(), "make": "Kia", "model": "Rio",
+                        "year": 2020, "price": 100, "status": "available"}))
+            except Exception as e:
+                errors.append(e)
+
+        def reader():
+            store = VersionedStore(StorageContext(self.path), self.initial)
+            seen = 0
+            try:
+                while any(t.is_alive() for t in threads):
+                    count = len(store.snapshot().inventory)
+                    # Readers only ever see whole, committed inventories
+                    self.assertGreaterEqual(count, seen)
+                    seen = count
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=writer) for _ in range(writers)]
+        readers = [threading.Thread(target=reader) for _ in range(2)]
+        for t in threads + readers:
+            t.start()
+        for t in threads + readers:
+            t.join()
+
+        self.assertEqual(errors, [])
+        with open(self.path) as f:
+            cars = json.load(f)
+        ids = [car["id"] for car in cars]
+        self.assertEqual(len(ids), 1 + writers * adds_per_writer)
+        self.assertEqual(len(set(ids)), len(ids))
+        self.assertEqual(VersionedStore(StorageContext(self.path)).snapshot()[0], 1 + writers * adds_per_writer)
+
+
+class TestWriteBehindStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'inventory.json')
+        self.initial = [{"id": 1, "make": "Toyota", "model": "Camry", "year": 2020, "price": 24090, "status": "available"}]
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _read_file(self):
+        with open(self.path) as f:
+            return json.load(f)
+
+    def _add(self, inventory):
+        return inventory.add({"id": inventory.next_id(), "make": "Kia", "model": "Rio",
+                              "year": 2020, "price": 100, "status": "available"})
+
+    def test_group_commit_is_durable_when_acknowledged(self):
+        store = WriteBehindStore(VersionedStore(StorageContext(self.path), self.initial), "group")
+        threads = [threading.Thread(target=store.update, args=(self._add,)) for _ in range(20)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(len(self._read_file()), 21)
+        # Concurrent changes were coalesced into fewer writes
+        self.assertLessEqual(store.writes, 20)
+        store.close()
+        self.assertEqual(VersionedStore(StorageContext(self.path)).snapshot().version, 21)
+
+    def test_failed_group_write_drops_the_change(self):
+        store = WriteBehindStore(VersionedStore(StorageContext(self.path), self.initial), "group")
+        with patch.object(store.store, 'commit', side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                store.update(self._add)
+        self.assertEqual(len(store.snapshot().inventory), 1)
+        # The client's retry adds the car once
+        store.update(self._add)
+        store.close()
+        self.assertEqual([car["id"] for car in self._read_file()], [1, 2])
+
+    def test_interval_writes_are_flushed_on_close(self):
+        store = WriteBehindStore(VersionedStore(StorageContext(self.path), self.initial), "interval", 60)
+        version, _ = store.update(self._add)
+        store.update(self._add)
+        # Applied in memory at once, not yet on disk
+        self.assertEqual(len(store.snapshot().inventory), 3)
+        self.assertEqual(len(self._read_file()), 1)
+        with self.assertRaises(VersionConflict):
+            store.update(self._add, expected_version=version)
+        store.close()
+        self.assertEqual(len(self._read_file()), 3)
+        self.assertEqual(store.writes, 1)
+        with self.assertRaises(RuntimeError):
+            store.update(self._add)
+
+    def test_flush_skips_the_interval(self):
+        store = WriteBehindStore(VersionedStore(StorageContext(self.path), self.initial), "interval", 60)
+        store.update(self._add)
+        store.flush()
+        self.assertEqual(len(self._read_file()), 2)
+        store.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,260 @@
+"""
+Benchmarks for storage, the CLI functions and the Flask routes.
+
+    python tools/benchmark.py --sizes 1000,100000 --output results.json
+    python tools/benchmark.py --sizes 1000,100000 --baseline results.json
+
+Every benchmark runs on a synthetic inventory of each size in a temporary
+directory and reports throughput and p50/p95/p99 latency. With --baseline the
+run is compared with a saved --output file and the exit status is 1 when any p50
+is slower than the baseline by more than --threshold.
+"""
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+ROOT = Path(__file__).resolve().parent.parent
+for path in (ROOT, ROOT / "app"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+import storage
+import functions
+from inventory import Inventory
+
+BRANDS = ("Toyota", "Honda", "Ford", "Tesla", "BMW", "Kia", "Mazda", "Audi", "Volvo", "Skoda")
+MODELS = ("Corolla", "Civic", "Focus", "Model3", "X5", "Rio", "CX5", "A4", "XC60", "Octavia")
+DEFAULT_SIZES = (1000, 10000)
+DEFAULT_ITERATIONS = 20
+DEFAULT_THRESHOLD = 0.25
+
+
+def generate_cars(count, schema="cli", seed=0):
+    """count synthetic cars in the CLI/storage or the Flask record schema; about 30% sold."""
+    rng = random.Random(seed)
+    cars = []
+    for car_id in range(1, count + 1):
+        brand = rng.choice(BRANDS)
+        model = rng.choice(MODELS)
+        year = rng.randint(2000, 2024)
+        sold = rng.random() < 0.3
+        if schema == "flask":
+            cars.append({"id": car_id, "make": brand, "model": model, "year": year,
+                         "price": rng.randint(5000, 80000), "status": "sold" if sold else "available"})
+        else:
+            buy_price = float(rng.randint(5000, 80000))
+            cars.append({"id": car_id, "brand": brand, "model": model, "year": year, "buy_price": buy_price,
+                         "sell_price": round(buy_price * rng.uniform(0.8, 1.4), 2) if sold else None,
+                         "is_sold": sold})
+    return cars
+
+
+def _percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def measure(name, size, operation, iterations):
+    """Call operation(i) iterations times and summarize the timings in milliseconds."""
+    timings = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        operation(i)
+        timings.append(time.perf_counter() - start)
+    ordered = sorted(timings)
+    total = sum(timings)
+    return {
+        "name": name,
+        "size": size,
+        "iterations": iterations,
+        "ops_per_sec": round(iterations / total, 2) if total else None,
+        "p50_ms": round(_percentile(ordered, 0.50) * 1000, 3),
+        "p95_ms": round(_percentile(ordered, 0.95) * 1000, 3),
+        "p99_ms": round(_percentile(ordered, 0.99) * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+@contextlib.contextmanager
+def _answers(*values):
+    """Feed input() and swallow print() for the interactive CLI functions."""
+    with patch("builtins.input", side_effect=list(values)), contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+def bench_storage(size, iterations, workdir, backend="json"):
+    context = storage.resolve_context(Path(workdir) / f"storage-{size}.json", backend=backend)
+    storage.set_context(context)
+    storage.save_inventory(generate_cars(size))
+    inventory = Inventory(storage.load_inventory())
+    return [
+        measure("storage.load_inventory", size, lambda i: storage.load_inventory(), iterations),
+        measure("storage.save_inventory", size, lambda i: storage.save_inventory(inventory), iterations),
+    ]
+
+
+def bench_functions(size, iterations, workdir):
+    storage.set_context(storage.resolve_context(Path(workdir) / f"functions-{size}.json", backend="json"))
+    cars = generate_cars(size)
+    inventory = Inventory(cars)
+    storage.save_inventory(inventory)
+    first_new_id = inventory.next_id()
+
+    # The suites run in order and each car can be sold only once, so sell_car()
+    # sells the cars add_car() added: one per iteration, however large size is
+    def add(i):
+        with _answers(first_new_id + i, "Kia", "Rio", "2020", "9000"):
+            functions.add_car(inventory)
+
+    def sell(i):
+        with _answers(first_new_id + i, "12000"):
+            functions.sell_car(inventory)
+
+    def edit(i):
+        # The last answer is the new sell price, asked for sold cars only
+        with _answers(cars[i % size]["id"], "Mazda", "CX5", "2021", "15000", "16000"):
+            functions.edit_car(inventory)
+
+    def remove(i):
+        with _answers(first_new_id + i):
+            functions.remove_car(inventory)
+
+    def sort(i):
+        with _answers("year" if i % 2 else "id"):
+            functions.sort_cars(inventory)
+
+    def stats(i):
+        with _answers():
+            functions.show_stats(inventory)
+
+    return [measure(f"functions.{name}", size, operation, iterations)
+            for name, operation in (("add_car", add), ("sell_car", sell), ("edit_car", edit),
+                                    ("remove_car", remove), ("sort_cars", sort), ("show_stats", stats))]
+
+
+def bench_routes(size, iterations, workdir):
+    # Importing app opens its store; outside a deployment give it a scratch file
+    with patch.dict(os.environ):
+        os.environ.setdefault("DATA_FILE", str(Path(workdir) / "flask-default.json"))
+        import app as app_module
+    from store import VersionedStore
+
+    context = storage.StorageContext(Path(workdir) / f"flask-{size}.json",
+                                     serializer=storage.JsonSerializer(indent=4))
+    saved_store = app_module.store
+    app_module.store = VersionedStore(context, generate_cars(size, schema="flask"))
+    client = app_module.app.test_client()
+    # Selling a sold car again still commits, so the IDs can repeat
+    sold = itertools.cycle(range(1, size + 1))
+
+    def get(url):
+        def operation(i):
+            response = client.get(url)
+            response.get_data()
+            assert response.status_code == 200, (url, response.status_code)
+        return operation
+
+    def add(i):
+        client.post("/add", data={"make": "Kia", "model": "Rio", "year": "2020", "price": "9000"})
+
+    def sell(i):
+        client.post(f"/sell/{next(sold)}")
+
+    try:
+        return [measure(f"GET {url}", size, get(url), iterations)
+                for url in ("/", "/api/inventory?limit=100", "/api/inventory?make=kia&min_year=2020&limit=100",
+                            "/api/stats", "/api/inventory/export")] + [
+            measure("POST /add", size, add, iterations),
+            measure("POST /sell/<id>", size, sell, iterations),
+        ]
+    finally:
+        app_module.store = saved_store
+
+
+SUITES = {"storage": bench_storage, "functions": bench_functions, "routes": bench_routes}
+
+
+def run_suite(sizes=DEFAULT_SIZES, iterations=DEFAULT_ITERATIONS, suites=tuple(SUITES)):
+    results = []
+    saved_context = storage._context
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            for size in sizes:
+                for suite in suites:
+                    results.extend(SUITES[suite](size, iterations, workdir))
+    finally:
+        storage.set_context(saved_context)
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": results,
+    }
+
+
+def compare(report, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Return one row per benchmark found in both runs: (name, size, p50, baseline
+    p50, relative change, regressed).
+    """
+    previous = {(r["name"], r["size"]): r for r in baseline["results"]}
+    rows = []
+    for result in report["results"]:
+        before = previous.get((result["name"], result["size"]))
+        if before is None or not before["p50_ms"]:
+            continue
+        change = result["p50_ms"] / before["p50_ms"] - 1
+        rows.append((result["name"], result["size"], result["p50_ms"], before["p50_ms"], change,
+                     change > threshold))
+    return rows
+
+
+def print_report(report):
+    print(f"{'benchmark':<55} {'size':>8} {'ops/s':>10} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10}")
+    for r in report["results"]:
+        print(f"{r['name']:<55} {r['size']:>8} {r['ops_per_sec']:>10} {r['p50_ms']:>10} "
+              f"{r['p95_ms']:>10} {r['p99_ms']:>10}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Car Lot Manager benchmarks")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="comma separated inventory sizes, e.g. 1000,100000,1000000")
+    parser.add_argument("--iterations", type=int, default=DEFAULT_ITERATIONS)
+    parser.add_argument("--suite", action="append", choices=sorted(SUITES),
+                        help="run only this suite (repeatable)")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--baseline", help="compare with the JSON results of an earlier run")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed p50 slowdown against the baseline (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    report = run_suite(sizes, args.iterations, args.suite or tuple(SUITES))
+    print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+    if not args.baseline:
+        return 0
+    with open(args.baseline, "r", encoding="utf-8") as fh:
+        baseline = json.load(fh)
+    rows = compare(report, baseline, args.threshold)
+    print()
+    print(f"{'benchmark':<55} {'size':>8} {'p50 ms':>10} {'baseline':>10} {'change':>8}")
+    for name, size, p50, before, change, regressed in rows:
+        print(f"{name:<55} {size:>8} {p50:>10} {before:>10} {change:>+8.1%}{'  REGRESSION' if regressed else ''}")
+    return 1 if any(row[-1] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
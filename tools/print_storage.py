@@ -1,6 +1,8 @@
 import storage
-p = storage._data_file()
+context = storage.get_context()
+p = context.path
 print('DATA_FILE:', p)
+print('BACKEND:', context.backend)
 print('EXISTS:', p.exists())
 if p.exists():
     print(p.read_text())
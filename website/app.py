@@ -11,26 +11,37 @@ except Exception:
         sys.path.insert(0, str(root))
     import storage
 
-
-# Session state for inventory and welcome screen
-if 'inventory' not in st.session_state:
+# The Inventory container lives with the CLI code in app/
+app_dir = Path(__file__).resolve().parent.parent / "app"
+if str(app_dir) not in sys.path:
+    sys.path.insert(0, str(app_dir))
+from inventory import Inventory
+import analytics
+
+
+# Session state for inventory and welcome screen. Every save bumps the storage
+# version, so a rerun reloads the inventory only when some writer changed it.
+version = storage.get_context().version()
+if 'inventory' not in st.session_state or st.session_state.get('version') != version:
     # Load persisted inventory (creates initial dummy data if needed)
-    st.session_state.inventory = storage.load_inventory()
+    st.session_state.inventory = Inventory(storage.load_inventory())
+    st.session_state.version = version
 if 'welcome_shown' not in st.session_state:
     st.session_state.welcome_shown = False
 
 inventory = st.session_state.inventory
 
-def display_inventory():
+def display_inventory(cars=None):
     """
-    Display all cars in the inventory with their details and status.
+    Display all cars in the inventory (or the given cars, in their order) with their
+    details and status.
     """
     st.subheader("📋 Inventory")
     if not inventory:
         st.info("No cars in inventory.")
         return
 
-    for car in inventory:
+    for car in inventory if cars is None else cars:
         st.write(f"**ID {car['id']}** - {car['brand']} {car['model']} ({car['year']})")
         st.write(f"🛒 Buy Price: {car['buy_price']}")
         if car["is_sold"]:
@@ -56,10 +67,10 @@ def add_car():
                 st.error("Brand must contain only letters.")
             elif buy_price < 0:
                 st.error("Buy Price cannot be negative.")
-            elif any(car['id'] == int(car_id) for car in inventory):
+            elif int(car_id) in inventory:
                 st.error("Car ID already exists. Please choose a unique ID.")
             else:
-                inventory.append({
+                inventory.add({
                     "id": int(car_id),
                     "brand": brand,
                     "model": model,
@@ -84,13 +95,9 @@ def sell_car():
     selected_id = st.selectbox("Choose Car ID to sell", available_ids)
     sell_price = st.number_input("Sell Price", step=100)
     if st.button("Sell"):
-        for car in inventory:
-            if car["id"] == selected_id:
-                car["sell_price"] = float(sell_price)
-                car["is_sold"] = True
-                storage.save_inventory(inventory)
-                st.success(f"Car {selected_id} sold. Profit: {car['sell_price'] - car['buy_price']:.2f}")
-                return
+        car = inventory.update(selected_id, sell_price=float(sell_price), is_sold=True)
+        storage.save_inventory(inventory)
+        st.success(f"Car {selected_id} sold. Profit: {car['sell_price'] - car['buy_price']:.2f}")
 
 def show_stats():
     """
@@ -100,17 +107,26 @@ def show_stats():
     if not inventory:
         st.info("No data.")
         return
-    sold = [car for car in inventory if car["is_sold"]]
-    total = len(inventory)
-    total_profit = sum(c["sell_price"] - c["buy_price"] for c in sold)
-    avg_profit = total_profit / len(sold) if sold else 0
-    avg_buy = sum(c["buy_price"] for c in inventory) / total
+    stats = inventory.stats()
+
+    st.metric("Total Cars", stats.total)
+    st.metric("Sold Cars", stats.sold)
+    st.metric("Avg Buy Price", f"{stats.average_buy_price:.2f}")
+    st.metric("Total Profit", f"{stats.profit_sum:.2f}")
+    st.metric("Avg Profit", f"{stats.average_profit:.2f}")
 
-    st.metric("Total Cars", total)
-    st.metric("Sold Cars", len(sold))
-    st.metric("Avg Buy Price", f"{avg_buy:.2f}")
-    st.metric("Total Profit", f"{total_profit:.2f}")
-    st.metric("Avg Profit", f"{avg_profit:.2f}")
+    for title, field in (("Cars by Year", "year"), ("Cars by Buy Price", "buy_price")):
+        buckets = inventory.range_index(field).histogram()
+        st.markdown(f"**{title}**")
+        st.bar_chart({str(bucket["from"]): bucket["count"] for bucket in buckets})
+
+    if analytics.available():
+        report = analytics.InventoryColumns.from_records(inventory).report()
+        if report["margin_by_brand"]:
+            st.markdown("**Margin by Brand**")
+            st.table(report["margin_by_brand"])
+            st.markdown("**Margin by Year**")
+            st.table(report["margin_by_year"])
 
 
 
@@ -132,23 +148,21 @@ menu = st.sidebar.selectbox("Navigate", ["Display", "Add Car", "Sell Car", "Sort
 
 def sort_cars():
     """
-    Sort the inventory by a selected field and order, then display the sorted list.
+    Display the inventory sorted by the selected fields. Sorting is a view only: the
+    stored order is not changed and nothing is saved.
     """
     st.subheader("🔀 Sort Cars")
     if not inventory:
         st.info("No cars to sort.")
         return
     sort_options = ["id", "brand", "model", "year", "buy_price", "sell_price", "is_sold"]
-    key = st.selectbox("Sort by", sort_options)
-    reverse = st.checkbox("Descending order", value=False)
-    if st.button("Sort"):
-        try:
-            inventory.sort(key=lambda x: (x[key] if x[key] is not None else 0), reverse=reverse)
-            storage.save_inventory(inventory)
-            st.success(f"Sorted by {key} ({'descending' if reverse else 'ascending'})!")
-        except Exception as e:
-            st.error(f"Error sorting: {e}")
-    display_inventory()
+    keys = st.multiselect("Sort by", sort_options, default=["id"])
+    descending = st.multiselect("Descending", keys)
+    if not keys:
+        display_inventory()
+        return
+    spec = tuple((key, key in descending) for key in keys)
+    display_inventory(inventory.sorted_by(spec))
 
 if menu == "Display":
     display_inventory()